@@ -5,11 +5,11 @@
 # DIAGRAMA DE SECUENCIA: Usuario -> Streamlit -> Exportador -> Librerías -> Cliente
 # ============================================
 import os  # Importación estándar para manejar archivos del sistema operativo
-import requests  # Librería para hacer peticiones HTTP
 import pandas as pd  # Librería para manipular datos en formato tabla (DataFrame)
 from bs4 import BeautifulSoup  # Parser HTML para scraping
 from datetime import datetime  # Para manejar fechas
 import streamlit as st  # Framework para interfaces web
+from sesion_http import Bloqueado, obtener_sesion  # Sesión HTTP compartida (pool de conexiones, timeouts y reintentos)
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage  # Componentes para generar PDFs
 from reportlab.lib.pagesizes import letter  # Tamaño de hoja carta para el PDF
 from reportlab.lib.styles import getSampleStyleSheet  # Estilos por defecto para el PDF
@@ -38,7 +38,7 @@ def generate_pdf(data, query):
 
         if item.get("URL Imagen"):  # Si hay una imagen disponible
             try:
-                response = requests.get(item["URL Imagen"], stream=True, timeout=5)  # Descarga de imagen
+                response = obtener_sesion().get(item["URL Imagen"], timeout=5)  # Descarga de imagen
                 if response.status_code == 200:
                     image_bytes = io.BytesIO(response.content)  # Se convierte la imagen a bytes
                     img = RLImage(image_bytes, width=100, height=100)  # Se inserta la imagen con tamaño definido
@@ -72,7 +72,10 @@ def get_product_info_amazon(url):
         'Accept-Language': 'en-US,en;q=0.9'
     }
 
-    response = requests.get(url, headers=headers)  # Petición a Amazon
+    try:
+        response = obtener_sesion().get(url, headers=headers)  # Petición a Amazon
+    except Bloqueado:
+        return 'No title found', None, None  # Amazon frenó la petición: el producto se omite
     soup = BeautifulSoup(response.text, features='lxml')  # Parsing del HTML
 
     try:
@@ -104,7 +107,10 @@ def get_search_results_amazon(query):
     }
 
     url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"  # Construye la URL de búsqueda
-    response = requests.get(url, headers=headers)  # Realiza la búsqueda
+    try:
+        response = obtener_sesion().get(url, headers=headers)  # Realiza la búsqueda
+    except Bloqueado:
+        return []  # Amazon frenó la búsqueda: sin resultados
     soup = BeautifulSoup(response.text, features='lxml')  # Parseo del HTML
 
     product_links = []  # Lista de enlaces de productos
@@ -118,7 +124,7 @@ def get_search_results_amazon(query):
 # ============================================
 def obtener_titulo_desde_pagina(url, headers):
     try:
-        respuesta = requests.get(url, headers=headers)  # Solicitud HTTP al producto
+        respuesta = obtener_sesion().get(url, headers=headers)  # Solicitud HTTP al producto
         sopa = BeautifulSoup(respuesta.text, "html.parser")  # Parseo del HTML
         titulo_tag = sopa.find("h1", class_="ui-pdp-title")  # Encuentra el título del producto
         return titulo_tag.text.strip() if titulo_tag else "Sin título"  # Devuelve título o mensaje
@@ -133,7 +139,10 @@ def buscar_en_mercado_libre(producto: str, limite=10):
     query = producto.replace(" ", "+")  # Reemplaza espacios para crear la URL de búsqueda
     url = f"https://listado.mercadolibre.com.mx/{query}"  # Construye la URL de búsqueda
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}  # Encabezado para evitar bloqueo
-    respuesta = requests.get(url, headers=headers)  # Realiza la petición HTTP
+    try:
+        respuesta = obtener_sesion().get(url, headers=headers)  # Realiza la petición HTTP
+    except Bloqueado:
+        return []  # Mercado Libre frenó la búsqueda: sin resultados
     sopa = BeautifulSoup(respuesta.text, "html.parser")  # Parsea el HTML
 
     items = sopa.find_all("li", class_="ui-search-layout__item")  # Encuentra los items de productos
@@ -0,0 +1,115 @@
+# Precios comparables entre tiendas: convierte lotes completos a una moneda base
+# con la tabla de tasas local y calcula, por tienda, percentiles, atípicos y un
+# puntaje de oferta. Todo sobre columnas de NumPy/pandas, sin recorrer productos.
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from producto import como_lote
+from rutas import ruta_datos
+from tiendas import moneda_de
+
+RUTA_TASAS = ruta_datos("tasas.json")
+MONEDA_BASE = "MXN"
+# Unidades de la moneda base por unidad de cada moneda. .dealminer/tasas.json las
+# reemplaza, p. ej. {"base": "MXN", "tasas": {"USD": 18.4}}
+TASAS_PREDETERMINADAS = {"MXN": 1.0, "USD": 18.5}
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+# Fuera de [Q1 - k·IQR, Q3 + k·IQR] de su tienda: accesorios, lotes, precios mal leídos
+FACTOR_IQR = 1.5
+
+COLUMNA_ATIPICO = "Atípico"
+COLUMNA_PUNTAJE = "Puntaje oferta"
+
+
+@dataclass(slots=True)
+class Tasas:
+    base: str = MONEDA_BASE
+    tasas: dict = field(default_factory=lambda: dict(TASAS_PREDETERMINADAS))
+
+    def factor(self, moneda):
+        # NaN para una moneda sin tasa: el producto queda al final y fuera de las estadísticas
+        if moneda == self.base:
+            return 1.0
+        return self.tasas.get(moneda, np.nan)
+
+    def precio_base(self, producto):
+        return producto.precio * self.factor(producto.moneda)
+
+    @property
+    def columna(self):
+        return f"Precio {self.base}"
+
+
+def cargar_tasas(ruta=RUTA_TASAS):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return Tasas()
+    base = datos.get("base", MONEDA_BASE)
+    # Las tasas por defecto están en MXN; con otra base solo valen las del archivo
+    tasas = dict(TASAS_PREDETERMINADAS) if base == MONEDA_BASE else {}
+    tasas.update({moneda: float(tasa) for moneda, tasa in datos.get("tasas", {}).items()})
+    tasas[base] = 1.0
+    return Tasas(base, tasas)
+
+
+def _por_tienda(lote):
+    # Códigos por producto y nombres de tienda distintos (una conversión por tienda, no por producto)
+    return pd.factorize(np.asarray(lote.tiendas, dtype=object))
+
+
+def precios_base(resultados, tasas):
+    lote = como_lote(resultados)
+    codigos, tiendas = _por_tienda(lote)
+    factores = np.array([tasas.factor(moneda_de(tienda)) for tienda in tiendas], dtype=np.float64)
+    return np.asarray(lote.precios, dtype=np.float64) * factores[codigos]
+
+
+def ordenar(resultados, tasas, descendente=False):
+    lote = como_lote(resultados)
+    base = precios_base(lote, tasas)
+    orden = np.argsort(-base if descendente else base, kind="stable")
+    return lote.tomar(orden.tolist())
+
+
+def tabla(resultados, tasas):
+    # El DataFrame de Lote.a_pandas más el precio en moneda base, la marca de
+    # atípico (por tienda) y el puntaje: % por debajo de la mediana del lote
+    # (sin atípicos); negativo si está por encima, NaN para los atípicos
+    lote = como_lote(resultados)
+    df = lote.a_pandas()
+    codigos, _ = _por_tienda(lote)
+    base = precios_base(lote, tasas)
+    cuartiles = pd.Series(base).groupby(codigos).quantile([0.25, 0.75]).unstack()
+    q1 = cuartiles[0.25].to_numpy()[codigos] if len(lote) else base
+    q3 = cuartiles[0.75].to_numpy()[codigos] if len(lote) else base
+    rango = q3 - q1
+    atipico = (base < q1 - FACTOR_IQR * rango) | (base > q3 + FACTOR_IQR * rango)
+    validos = base[~atipico & ~np.isnan(base)]
+    mediana = np.median(validos) if len(validos) else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        puntaje = np.where(atipico, np.nan, 100 * (1 - base / mediana))
+
+    df[tasas.columna] = base
+    df[COLUMNA_ATIPICO] = atipico
+    df[COLUMNA_PUNTAJE] = puntaje.round(1)
+    df.attrs["moneda_base"] = tasas.base
+    return df
+
+
+def estadisticas(df):
+    # Una fila por tienda a partir de la tabla anterior: conteo, media, percentiles,
+    # extremos, cuántos atípicos tiene y su mejor puntaje de oferta
+    columna = f"Precio {df.attrs.get('moneda_base', MONEDA_BASE)}"
+    grupos = df.groupby("Tienda", sort=True)
+    resumen = grupos[columna].describe(percentiles=list(PERCENTILES)).rename(columns={
+        "count": "Productos", "mean": "Promedio", "std": "Desv. estándar", "min": "Mínimo", "max": "Máximo",
+    })
+    resumen["Atípicos"] = grupos[COLUMNA_ATIPICO].sum()
+    resumen["Mejor puntaje"] = grupos[COLUMNA_PUNTAJE].max()
+    resumen["Productos"] = resumen["Productos"].astype(int)
+    return resumen
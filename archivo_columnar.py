@@ -0,0 +1,120 @@
+import io
+import os
+import uuid
+from datetime import datetime
+from producto import como_lote
+from rutas import ruta_datos
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DIRECTORIO_ARCHIVO = ruta_datos("archivo")
+FORMATOS = {"parquet": "parquet", "arrow": "ipc"}
+PARTICIONES = ["fecha", "tienda"]
+
+if pa is not None:
+    ESQUEMA = pa.schema([
+        ("fecha", pa.string()),
+        ("tienda", pa.string()),
+        ("consulta", pa.string()),
+        ("titulo", pa.string()),
+        ("precio", pa.float64()),
+        ("url_producto", pa.string()),
+        ("url_imagen", pa.string()),
+        ("capturado", pa.timestamp("s")),
+    ])
+
+
+def disponible():
+    return pa is not None
+
+
+def _requerir():
+    if pa is None:
+        raise ImportError("El archivo columnar necesita pyarrow (pip install pyarrow)")
+
+
+def tabla(resultados, consulta=None, capturado=None):
+    _requerir()
+    capturado = capturado or datetime.now().replace(microsecond=0)
+    columnas = como_lote(resultados).a_arrow()
+    filas = columnas.num_rows
+    return pa.table({
+        "fecha": pa.array([capturado.strftime('%Y-%m-%d')] * filas, pa.string()),
+        "tienda": columnas["tienda"],
+        "consulta": pa.array([consulta] * filas, pa.string()),
+        "titulo": columnas["titulo"],
+        "precio": columnas["precio"],
+        "url_producto": columnas["url_producto"],
+        "url_imagen": columnas["url_imagen"],
+        "capturado": pa.array([capturado] * filas, pa.timestamp("s")),
+    }, schema=ESQUEMA)
+
+
+def parquet_en_memoria(resultados, consulta=None):
+    buffer = io.BytesIO()
+    pq.write_table(tabla(resultados, consulta), buffer, compression="zstd")
+    buffer.seek(0)
+    return buffer
+
+
+class ArchivoColumnar:
+    # Archivo histórico particionado por fecha y tienda (estilo Hive). Cada lote
+    # se agrega como un archivo nuevo, sin reescribir lo anterior; la lectura usa
+    # memoria mapeada y solo abre las particiones que pasan el filtro.
+    def __init__(self, directorio=DIRECTORIO_ARCHIVO, formato="parquet"):
+        _requerir()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        self.directorio = os.path.abspath(directorio)
+        self.formato = FORMATOS[formato]
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def agregar(self, resultados, consulta=None, capturado=None):
+        lote = tabla(resultados, consulta, capturado)
+        if not lote.num_rows:
+            return 0
+        extension = "parquet" if self.formato == "parquet" else "arrow"
+        ds.write_dataset(
+            lote,
+            self.directorio,
+            format=self.formato,
+            partitioning=PARTICIONES,
+            partitioning_flavor="hive",
+            basename_template=f"parte-{uuid.uuid4().hex}-{{i}}.{extension}",
+            existing_data_behavior="overwrite_or_ignore",
+            filesystem=self._fs,
+        )
+        return lote.num_rows
+
+    def dataset(self):
+        return ds.dataset(
+            self.directorio,
+            format=self.formato,
+            partitioning=ds.partitioning(pa.schema([("fecha", pa.string()), ("tienda", pa.string())]), flavor="hive"),
+            filesystem=self._fs,
+        )
+
+    def leer(self, desde=None, hasta=None, tiendas=None, columnas=None):
+        filtro = None
+        condiciones = []
+        if desde is not None:
+            condiciones.append(pc.field("fecha") >= _dia(desde))
+        if hasta is not None:
+            condiciones.append(pc.field("fecha") <= _dia(hasta))
+        if tiendas:
+            condiciones.append(pc.field("tienda").isin(list(tiendas)))
+        for condicion in condiciones:
+            filtro = condicion if filtro is None else filtro & condicion
+        return self.dataset().to_table(columns=columnas, filter=filtro)
+
+
+def _dia(valor):
+    return valor if isinstance(valor, str) else valor.strftime('%Y-%m-%d')
@@ -0,0 +1,126 @@
+# Mide de punta a punta la búsqueda, el parseo, el ordenamiento y análisis de precios,
+# el emparejamiento entre tiendas y cada exportación
+# contra el servidor local (sin tocar las tiendas reales).
+#
+#   python benchmarks/bench_dealminer.py [--tamanos 10 100 1000] [--repeticiones 5]
+#                                        [--latencia-ms 50] [--tasa-error 0.0]
+#
+# "tamaño" es el total de resultados; se reparte a partes iguales entre las dos tiendas.
+# La memoria es el pico de tracemalloc de una pasada aparte, sin cronometrar.
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analisis  # noqa: E402
+import cache_imagenes  # noqa: E402
+import emparejamiento  # noqa: E402
+import parseo  # noqa: E402
+from cache_http import CacheHTTP  # noqa: E402
+from cache_productos import CacheProductos  # noqa: E402
+from exportador import Exportador  # noqa: E402
+from servidor_local import ServidorLocal  # noqa: E402
+from sesion_http import SesionDealMiner  # noqa: E402
+from sincronizador import Sincronizador  # noqa: E402
+
+TIENDAS = ["Amazon", "Mercado Libre"]
+CONSULTA = "audifonos"
+TASAS = analisis.Tasas()
+
+
+def percentil(muestras, p):
+    ordenadas = sorted(muestras)
+    k = (len(ordenadas) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenadas) - 1)
+    return ordenadas[f] + (ordenadas[c] - ordenadas[f]) * (k - f)
+
+
+def sincronizador(servidor):
+    # Cachés de productos y de revalidación HTTP vacías en cada corrida para medir
+    # descargas en frío (sin ellas, desde la segunda corrida todo detalle es un 304)
+    return Sincronizador(
+        sesion=SesionDealMiner(cache_http=CacheHTTP(":memory:")),
+        cache=CacheProductos(":memory:"),
+        urls={"Amazon": f"{servidor.url_base}/amazon", "Mercado Libre": f"{servidor.url_base}/ml"},
+    )
+
+
+def etapas(servidor, por_tienda, directorio):
+    resultados = sincronizador(servidor).buscar(CONSULTA, TIENDAS, limite=por_tienda)
+    listado_ml = servidor.listado_mercado_libre()
+    busqueda_amazon = servidor.busqueda_amazon()
+
+    def exportar(generador):
+        def medir():
+            # Miniaturas en frío: un directorio nuevo por corrida
+            cache_imagenes._cache = cache_imagenes.CacheImagenes(
+                directorio=tempfile.mkdtemp(dir=directorio)
+            )
+            generador(resultados, CONSULTA)
+        return medir
+
+    return {
+        "busqueda": lambda: sincronizador(servidor).buscar(CONSULTA, TIENDAS, limite=por_tienda),
+        "parseo listados": lambda: (parseo.items_mercado_libre(listado_ml), parseo.enlaces_amazon(busqueda_amazon)),
+        "ordenar": lambda: analisis.ordenar(resultados, TASAS),
+        "analisis": lambda: analisis.estadisticas(analisis.tabla(resultados, TASAS)),
+        "emparejar": lambda: emparejamiento.agrupar(resultados),
+        "excel": exportar(Exportador.generar_excel),
+        "pdf": exportar(Exportador.generar_pdf),
+        "html": exportar(Exportador.generar_html),
+    }, len(resultados)
+
+
+def medir(funcion, repeticiones):
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append((time.perf_counter() - inicio) * 1000)
+    return muestras, pico
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--variacion-ms", type=float, default=0)
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"{'tamaño':>7}  {'etapa':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'pico MB':>9}")
+        for tamano in args.tamanos:
+            por_tienda = max(1, tamano // len(TIENDAS))
+            servidor = ServidorLocal(
+                resultados=por_tienda,
+                latencia=args.latencia_ms / 1000,
+                variacion=args.variacion_ms / 1000,
+                tasa_error=args.tasa_error,
+            )
+            with servidor:
+                casos, obtenidos = etapas(servidor, por_tienda, directorio)
+                for etapa, funcion in casos.items():
+                    muestras, pico = medir(funcion, args.repeticiones)
+                    print(f"{tamano:>7}  {etapa:<16}{percentil(muestras, 50):>10.1f}"
+                          f"{percentil(muestras, 95):>10.1f}{percentil(muestras, 99):>10.1f}"
+                          f"{pico / 1024 / 1024:>9.1f}")
+                print(f"{'':>7}  ({obtenidos} resultados, {servidor.peticiones} peticiones, "
+                      f"{servidor.errores} errores inyectados, {servidor.no_modificados} respuestas 304)")
+
+
+if __name__ == "__main__":
+    main()
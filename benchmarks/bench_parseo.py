@@ -0,0 +1,124 @@
+# Compara el parseo completo con BeautifulSoup (código anterior) contra la ruta
+# lxml/XPath de parseo.py usando las páginas guardadas en benchmarks/fixtures.
+#
+#   python benchmarks/bench_parseo.py [--repeticiones 30] [--fixtures DIR]
+#
+# Para medir con páginas reales, guarda el HTML con los mismos nombres de archivo
+# en otro directorio y pásalo con --fixtures.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import parseo  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FIXTURES = os.path.join(RAIZ, "benchmarks", "fixtures")
+
+CASOS = {
+    "amazon_producto": ("amazon_producto.html", parseo._producto_amazon_bs, parseo._producto_amazon_lxml),
+    "amazon_busqueda": ("amazon_busqueda.html", parseo._enlaces_amazon_bs, parseo._enlaces_amazon_lxml),
+    "ml_producto": ("ml_producto.html", parseo._titulo_mercado_libre_bs, parseo._titulo_mercado_libre_lxml),
+    "ml_listado": (
+        "ml_listado.html",
+        lambda html: parseo._items_mercado_libre_bs(html, None),
+        lambda html: parseo._items_mercado_libre_lxml(html, None),
+    ),
+}
+
+
+def leer(directorio, archivo):
+    with open(os.path.join(directorio, archivo), encoding="utf-8") as f:
+        return f.read()
+
+
+def tiempos(funcion, html, repeticiones):
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(html)
+        muestras.append((time.perf_counter() - inicio) * 1000)
+    return muestras
+
+
+def memoria_pico_kb(directorio, caso, metodo):
+    # El árbol de lxml vive en C y tracemalloc no lo ve; se mide el RSS máximo
+    # de un proceso hijo cuando el sistema lo permite.
+    if resource is None:
+        html = leer(directorio, CASOS[caso][0])
+        funcion = CASOS[caso][1 if metodo == "antes" else 2]
+        tracemalloc.start()
+        funcion(html)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return pico / 1024
+    salida = subprocess.run(
+        [sys.executable, __file__, "--fixtures", directorio, "--memoria", caso, metodo],
+        capture_output=True, text=True, check=True,
+    )
+    return float(salida.stdout.strip())
+
+
+def rss_maximo_kb():
+    # En Linux ru_maxrss se hereda del proceso padre a través de fork/exec;
+    # VmHWM se reinicia con exec, así que se prefiere cuando existe.
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return float(linea.split()[1])
+    except OSError:
+        pass
+    factor = 1024 if sys.platform == "darwin" else 1
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / factor
+
+
+def medir_memoria_hijo(directorio, caso, metodo):
+    html = leer(directorio, CASOS[caso][0])
+    funcion = CASOS[caso][1 if metodo == "antes" else 2]
+    base = rss_maximo_kb()
+    resultado = funcion(html)
+    pico = rss_maximo_kb()
+    del resultado
+    print(pico - base)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--memoria", nargs=2, metavar=("CASO", "METODO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memoria:
+        medir_memoria_hijo(args.fixtures, *args.memoria)
+        return
+
+    if parseo.lxml_html is None:
+        print("lxml no está instalado: la ruta rápida no está disponible.")
+        return
+
+    print(f"{'caso':<16}{'KB':>8}{'antes ms':>11}{'después ms':>12}{'x':>7}{'antes KB':>11}{'después KB':>12}  iguales")
+    for caso, (archivo, antes, despues) in CASOS.items():
+        html = leer(args.fixtures, archivo)
+        t_antes = statistics.median(tiempos(antes, html, args.repeticiones))
+        t_despues = statistics.median(tiempos(despues, html, args.repeticiones))
+        m_antes = memoria_pico_kb(args.fixtures, caso, "antes")
+        m_despues = memoria_pico_kb(args.fixtures, caso, "despues")
+        iguales = "sí" if antes(html) == despues(html) else "NO"
+        print(f"{caso:<16}{len(html) / 1024:>8.0f}{t_antes:>11.2f}{t_despues:>12.2f}"
+              f"{t_antes / t_despues:>7.1f}{m_antes:>11.0f}{m_despues:>12.0f}  {iguales}")
+
+
+if __name__ == "__main__":
+    main()
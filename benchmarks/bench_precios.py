@@ -0,0 +1,135 @@
+# Prueba aleatoria y medición de precios.py: genera precios conocidos escritos en
+# varios formatos (separadores de en-US, es-MX, es-AR, fr, de-CH; símbolos y
+# códigos de moneda; rangos; entero y centavos separados como en Mercado Libre),
+# verifica que se lean exactos, que el texto basura nunca rompa el parser, y mide
+# el costo por precio frente a la lectura anterior (quitar "$" y "," y float()).
+#
+#   python benchmarks/bench_precios.py [--casos 20000] [--semilla 0]
+#
+# Sale con código 1 si algún precio generado no se lee bien.
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import precios  # noqa: E402
+
+# (separador de miles, separador decimal)
+FORMATOS = {
+    "en-US": (",", "."),
+    "es-MX": (",", "."),
+    "es-AR": (".", ","),
+    "fr": (" ", ","),
+    "de-CH": ("'", "."),
+    "sin miles": ("", "."),
+}
+PREFIJOS = ["", "$", "$ ", "MX$", "MX$ ", "US$", "USD ", "R$ ", "Precio: "]
+SUFIJOS = ["", " MXN", " €", "€", " c/u", " + envío"]
+BASURA = "0123456789.,  '$-€abcMXUS "
+
+
+def escribir(valor, miles, decimal, centavos):
+    entero, fraccion = f"{valor:.2f}".split(".")
+    grupos = []
+    while len(entero) > 3:
+        grupos.insert(0, entero[-3:])
+        entero = entero[:-3]
+    texto = miles.join([entero] + grupos)
+    return f"{texto}{decimal}{fraccion}" if centavos else texto
+
+
+def casos(cantidad, azar):
+    for _ in range(cantidad):
+        centavos = azar.random() < 0.7
+        valor = round(azar.uniform(1, 2_000_000), 2) if centavos else float(azar.randint(1, 2_000_000))
+        miles, decimal = FORMATOS[azar.choice(list(FORMATOS))]
+        texto = azar.choice(PREFIJOS) + escribir(valor, miles, decimal, centavos) + azar.choice(SUFIJOS)
+        if azar.random() < 0.1:
+            hasta = valor * azar.uniform(1.1, 3)
+            texto += " - " + azar.choice(PREFIJOS) + escribir(hasta, miles, decimal, centavos)
+        yield texto, valor
+
+
+def casos_partidos(cantidad, azar):
+    # Mercado Libre: "<span fraction>1,299</span><span cents>50</span>"
+    for _ in range(cantidad):
+        entero = azar.randint(1, 2_000_000)
+        centavos = azar.choice([None, f"{azar.randint(0, 99):02d}"])
+        miles = azar.choice([",", "."])
+        valor = entero + (int(centavos) / 100 if centavos else 0)
+        yield (escribir(entero, miles, ".", False), centavos), valor
+
+
+def lectura_anterior(texto):
+    try:
+        return float(texto.replace('$', '').replace(',', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def basura(cantidad, azar):
+    return ["".join(azar.choice(BASURA) for _ in range(azar.randint(0, 20))) for _ in range(cantidad)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--casos", type=int, default=20000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    azar = random.Random(args.semilla)
+
+    generados = list(casos(args.casos, azar))
+    textos = [texto for texto, _ in generados]
+    leidos = precios.precios(textos)
+    errores = [(texto, esperado, leido) for (texto, esperado), leido in zip(generados, leidos)
+               if leido is None or not math.isclose(leido, esperado, rel_tol=1e-9)]
+    anteriores = sum(
+        1 for (texto, esperado) in generados
+        if (valor := lectura_anterior(texto)) is not None and math.isclose(valor, esperado, rel_tol=1e-9)
+    )
+
+    partidos = list(casos_partidos(args.casos // 4, azar))
+    errores += [(partes, esperado, leido) for partes, esperado in partidos
+                if not math.isclose(leido := precios.precio_partido(*partes) or -1, esperado, rel_tol=1e-9)]
+
+    fallas_basura = []
+    for texto in basura(args.casos, azar):
+        try:
+            valor = precios.precio(texto)
+        except Exception as e:
+            fallas_basura.append((texto, repr(e)))
+            continue
+        if valor is not None and (not math.isfinite(valor) or valor < 0):
+            fallas_basura.append((texto, valor))
+
+    inicio = time.perf_counter()
+    precios.precios(textos)
+    lote = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for texto in textos:
+        precios.precio(texto)
+    uno_a_uno = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for texto in textos:
+        lectura_anterior(texto)
+    anterior = time.perf_counter() - inicio
+
+    total = len(generados) + len(partidos)
+    print(f"precios generados:   {total}  mal leídos: {len(errores)}")
+    print(f"lectura anterior:    {anteriores}/{len(generados)} correctos ({100 * anteriores / len(generados):.1f} %)")
+    print(f"texto basura:        {args.casos}  fallas: {len(fallas_basura)}")
+    print(f"lote (precios):      {lote / len(textos) * 1e6:.2f} µs/precio")
+    print(f"uno a uno (precio):  {uno_a_uno / len(textos) * 1e6:.2f} µs/precio")
+    print(f"lectura anterior:    {anterior / len(textos) * 1e6:.2f} µs/precio")
+    for ejemplo in (errores + fallas_basura)[:10]:
+        print("  ", ejemplo)
+    sys.exit(1 if errores or fallas_basura else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# Servidor HTTP local que imita Amazon y Mercado Libre a partir de las páginas
+# guardadas en benchmarks/fixtures, con latencia y errores configurables.
+#
+#   python benchmarks/servidor_local.py --resultados 100 --latencia-ms 80 --tasa-error 0.02
+#
+# Rutas:
+#   /amazon/s?k=...&page=P   búsqueda de Amazon (N resultados paginados)
+#   /amazon/.../dp/<ASIN>    página de producto de Amazon
+#   /ml/<consulta>[_Desde_D] listado de Mercado Libre (N artículos paginados)
+#   /ml/articulo/MLM-<id>-.. página de detalle de Mercado Libre
+#   /img/<nombre>.jpg        imagen de producto
+#
+# Las respuestas 200 llevan ETag; un If-None-Match que coincide recibe 304.
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_TARJETA_AMAZON = re.compile(r'<div data-asin="[^"]*".*?</div></div></div>', re.S)
+_ITEM_ML = re.compile(r'<li class="ui-search-layout__item">.*?</li>', re.S)
+_ASIN = re.compile(r'data-asin="([^"]+)"')
+_ID_ML = re.compile(r"MLM-(\d+)")
+_OFFSCREEN = re.compile(r'(<span class="a-offscreen">)[^<]*')
+_FRACCION_ML = re.compile(r'(<span class="andes-money-amount__fraction"[^>]*>)[^<]*')
+_TITULO_ML = re.compile(r'(class="poly-component__title">)[^<]*')
+_DATA_SRC_ML = re.compile(r'data-src="[^"]*"')
+_TITULO_AMAZON = re.compile(r'(<span id="productTitle"[^>]*>).*?(</span>)', re.S)
+_IMAGEN_AMAZON = re.compile(r'(<img[^>]*?\ssrc=")[^"]*("[^>]*id="landingImage")')
+_PRODUCTO_AMAZON = re.compile(r"/dp/B(\d{9})")
+_PAGINA_AMAZON = re.compile(r"[?&]page=(\d+)")
+_DESDE_ML = re.compile(r"_Desde_(\d+)")
+
+
+def _leer(directorio, archivo, modo="r"):
+    with open(os.path.join(directorio, archivo), modo, **({} if "b" in modo else {"encoding": "utf-8"})) as f:
+        return f.read()
+
+
+def _partir(html, patron):
+    # prefijo, bloques de resultado y sufijo de una página de listado
+    bloques = list(patron.finditer(html))
+    if not bloques:
+        raise ValueError("la página no contiene bloques de resultado reconocibles")
+    return html[:bloques[0].start()], [b.group(0) for b in bloques], html[bloques[-1].end():]
+
+
+class ServidorLocal:
+    def __init__(self, resultados=10, latencia=0.05, variacion=0.0, tasa_error=0.0,
+                 fixtures=FIXTURES, host="127.0.0.1", puerto=0, semilla=0,
+                 por_pagina_amazon=16, por_pagina_ml=48):
+        self.resultados = resultados
+        self.por_pagina_amazon = por_pagina_amazon
+        self.por_pagina_ml = por_pagina_ml
+        self.latencia = latencia
+        self.variacion = variacion
+        self.tasa_error = tasa_error
+        self.semilla = semilla
+        self._azar = random.Random(semilla)
+        self._azar_lock = threading.Lock()
+        self.peticiones = 0
+        self.errores = 0
+        self.no_modificados = 0
+
+        self._amazon_busqueda = _partir(_leer(fixtures, "amazon_busqueda.html"), _TARJETA_AMAZON)
+        self._amazon_producto = _leer(fixtures, "amazon_producto.html")
+        self._ml_listado = _partir(_leer(fixtures, "ml_listado.html"), _ITEM_ML)
+        self._ml_producto = _leer(fixtures, "ml_producto.html")
+        self._imagen = _leer(fixtures, "imagen.jpg", "rb")
+        self._paginas = {}
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                servidor._atender(self)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, puerto), Manejador)
+        self._http.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url_base(self):
+        host, puerto = self._http.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def precio(self, indice):
+        return round(random.Random(self.semilla * 100003 + indice).uniform(5, 2000), 2)
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    # --- generación de páginas ---
+
+    def busqueda_amazon(self, pagina=1):
+        clave = ("amazon", pagina)
+        if clave not in self._paginas:
+            prefijo, tarjetas, sufijo = self._amazon_busqueda
+            inicio = (pagina - 1) * self.por_pagina_amazon
+            partes = [prefijo]
+            for i in range(inicio, min(inicio + self.por_pagina_amazon, self.resultados)):
+                plantilla = tarjetas[i % len(tarjetas)]
+                tarjeta = plantilla.replace(_ASIN.search(plantilla).group(1), f"B{i:09d}")
+                tarjeta = _OFFSCREEN.sub(lambda m: f"{m.group(1)}${self.precio(i):,.2f}", tarjeta, count=1)
+                partes.append(tarjeta)
+            partes.append(sufijo)
+            self._paginas[clave] = "\n".join(partes)
+        return self._paginas[clave]
+
+    def producto_amazon(self, indice):
+        html = _TITULO_AMAZON.sub(lambda m: f"{m.group(1)}Producto Amazon {indice}{m.group(2)}", self._amazon_producto, count=1)
+        html = _OFFSCREEN.sub(lambda m: f"{m.group(1)}${self.precio(indice):,.2f}", html, count=1)
+        return _IMAGEN_AMAZON.sub(lambda m: f"{m.group(1)}{self.url_base}/img/B{indice:09d}.jpg{m.group(2)}", html, count=1)
+
+    def listado_mercado_libre(self, desde=1):
+        clave = ("ml", desde)
+        if clave not in self._paginas:
+            prefijo, items, sufijo = self._ml_listado
+            partes = [prefijo]
+            for i in range(desde - 1, min(desde - 1 + self.por_pagina_ml, self.resultados)):
+                plantilla = items[i % len(items)]
+                item_id = 2000000000 + i
+                item = _ID_ML.sub(f"MLM-{item_id}", plantilla)
+                item = item.replace("https://articulo.mercadolibre.com.mx", f"{self.url_base}/ml/articulo")
+                item = _FRACCION_ML.sub(lambda m: f"{m.group(1)}{int(self.precio(item_id)):,}", item, count=1)
+                item = _TITULO_ML.sub(lambda m: f"{m.group(1)}Producto Mercado Libre {i}", item, count=1)
+                item = _DATA_SRC_ML.sub(f'data-src="{self.url_base}/img/MLM{item_id}.jpg"', item, count=1)
+                partes.append(item)
+            partes.append(sufijo)
+            self._paginas[clave] = "\n".join(partes)
+        return self._paginas[clave]
+
+    # --- atención de peticiones ---
+
+    def _atender(self, manejador):
+        with self._azar_lock:
+            self.peticiones += 1
+            espera = self.latencia + self._azar.uniform(0, self.variacion)
+            falla = self._azar.random() < self.tasa_error
+            if falla:
+                self.errores += 1
+        if espera > 0:
+            time.sleep(espera)
+        if falla:
+            return self._responder(manejador, 503, b"Service Unavailable", "text/plain")
+
+        ruta = manejador.path
+        if ruta.startswith("/img/"):
+            return self._responder(manejador, 200, self._imagen, "image/jpeg")
+        if ruta.startswith("/amazon/s?"):
+            pagina = _PAGINA_AMAZON.search(ruta)
+            return self._html(manejador, self.busqueda_amazon(int(pagina.group(1)) if pagina else 1))
+        producto = _PRODUCTO_AMAZON.search(ruta)
+        if ruta.startswith("/amazon/") and producto:
+            return self._html(manejador, self.producto_amazon(int(producto.group(1))))
+        if ruta.startswith("/ml/articulo/"):
+            return self._html(manejador, self._ml_producto)
+        if ruta.startswith("/ml/"):
+            desde = _DESDE_ML.search(ruta)
+            return self._html(manejador, self.listado_mercado_libre(int(desde.group(1)) if desde else 1))
+        return self._responder(manejador, 404, b"Not Found", "text/plain")
+
+    def _html(self, manejador, html):
+        return self._responder(manejador, 200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _responder(self, manejador, estado, cuerpo, tipo):
+        if estado == 200:
+            etag = f'"{hashlib.sha1(cuerpo).hexdigest()[:16]}"'
+            if manejador.headers.get("If-None-Match") == etag:
+                with self._azar_lock:
+                    self.no_modificados += 1
+                manejador.send_response(304)
+                manejador.send_header("ETag", etag)
+                manejador.end_headers()
+                return
+        manejador.send_response(estado)
+        if estado == 200:
+            manejador.send_header("ETag", etag)
+        manejador.send_header("Content-Type", tipo)
+        manejador.send_header("Content-Length", str(len(cuerpo)))
+        manejador.end_headers()
+        manejador.wfile.write(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resultados", type=int, default=10)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--variacion-ms", type=float, default=0)
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+
+    servidor = ServidorLocal(
+        resultados=args.resultados,
+        latencia=args.latencia_ms / 1000,
+        variacion=args.variacion_ms / 1000,
+        tasa_error=args.tasa_error,
+        fixtures=args.fixtures,
+        puerto=args.puerto,
+    )
+    print(f"Amazon:        {servidor.url_base}/amazon")
+    print(f"Mercado Libre: {servidor.url_base}/ml")
+    try:
+        servidor._http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
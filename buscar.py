@@ -0,0 +1,200 @@
+# Búsquedas por lotes sin interfaz: lee una consulta por línea, las corre en
+# paralelo con el Sincronizador y escribe los productos en JSONL (uno por línea)
+# o Parquet. No importa Streamlit, plotly ni reportlab, así que arranca rápido
+# desde cron, scripts o pruebas.
+#
+#   python buscar.py consultas.txt --salida resultados.jsonl
+#   python buscar.py consultas.txt --tiendas Amazon --limite 50 --salida precios.parquet
+#   cat consultas.txt | python buscar.py - --concurrentes 2 > resultados.jsonl
+#
+# Se ignoran las líneas vacías, las que empiezan con "#" y las consultas repetidas.
+# Sin --salida (o con "-") el JSONL va a la salida estándar y el avance, a la de
+# errores. Una consulta sin resultados (por ejemplo, porque todas sus tiendas
+# fallaron o pasaron su plazo) cuenta como fallida y el proceso sale con código 1.
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache_busquedas import normalizar_consulta
+from historial import historial_compartido
+from metricas import contar, cronometro, metricas_compartidas
+from sincronizador import Sincronizador
+from tiendas import nombres_tiendas
+
+CONCURRENTES = 4
+FORMATOS_SALIDA = ("jsonl", "parquet")
+
+
+def leer_consultas(lineas):
+    consultas = []
+    vistas = set()
+    for linea in lineas:
+        consulta = linea.strip()
+        if not consulta or consulta.startswith("#"):
+            continue
+        normalizada = normalizar_consulta(consulta)
+        if normalizada in vistas:
+            continue
+        vistas.add(normalizada)
+        consultas.append(consulta)
+    return consultas
+
+
+def registros(resultados, consulta):
+    for producto in resultados:
+        yield {
+            "consulta": consulta,
+            "tienda": producto.tienda,
+            "titulo": producto.titulo,
+            "precio": producto.precio,
+            "moneda": producto.moneda,
+            "url_producto": producto.url_producto,
+            "url_imagen": producto.url_imagen,
+            "fecha": producto.fecha,
+        }
+
+
+class SalidaJSONL:
+    def __init__(self, ruta):
+        self._archivo = sys.stdout if ruta in (None, "-") else open(ruta, "w", encoding="utf-8")
+
+    def escribir(self, resultados, consulta):
+        for registro in registros(resultados, consulta):
+            self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+
+    def cerrar(self):
+        if self._archivo is not sys.stdout:
+            self._archivo.close()
+
+
+class SalidaParquet:
+    # Un grupo de filas por consulta, con el mismo esquema que el archivo columnar
+    def __init__(self, ruta):
+        import archivo_columnar
+        self._columnar = archivo_columnar
+        self._escritor = archivo_columnar.pq.ParquetWriter(ruta, archivo_columnar.ESQUEMA, compression="zstd")
+
+    def escribir(self, resultados, consulta):
+        if resultados:
+            self._escritor.write_table(self._columnar.tabla(resultados, consulta))
+
+    def cerrar(self):
+        self._escritor.close()
+
+
+def formato_de(ruta):
+    return "parquet" if ruta and ruta.lower().endswith(".parquet") else "jsonl"
+
+
+def _motivos(vencidas, fallidas):
+    return [f"{tienda} falló" for tienda in fallidas] + [f"{tienda} pasó su plazo" for tienda in vencidas]
+
+
+def buscar_lote(consultas, sincronizador, tiendas, limite=10, concurrentes=CONCURRENTES, plazos=None):
+    # Entrega (consulta, resultados, avisos, error, segundos) conforme termina cada
+    # consulta; error es None si hubo resultados y avisos lista las tiendas que
+    # fallaron o vencieron. Las descargas de todas comparten el motor, que respeta
+    # los límites por host.
+    def correr(consulta):
+        vencidas = []
+        fallidas = []
+        inicio = time.perf_counter()
+        with cronometro("busqueda", origen="lote"):
+            resultados = sincronizador.buscar(consulta, tiendas, limite, plazos, vencidas, fallidas)
+        return resultados, _motivos(vencidas, fallidas), time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrentes), thread_name_prefix="consulta") as hilos:
+        futuros = {hilos.submit(correr, consulta): consulta for consulta in consultas}
+        for futuro in as_completed(futuros):
+            consulta = futuros[futuro]
+            try:
+                resultados, avisos, segundos = futuro.result()
+            except Exception as e:
+                contar("consultas_fallidas", origen="lote")
+                yield consulta, None, [], e, 0.0
+                continue
+            if not resultados:
+                contar("consultas_fallidas", origen="lote")
+                error = "sin resultados" + (f" ({', '.join(avisos)})" if avisos else "")
+                yield consulta, resultados, avisos, error, segundos
+                continue
+            yield consulta, resultados, avisos, None, segundos
+
+
+def _url(valor):
+    nombre, separador, url = valor.partition("=")
+    if not separador or nombre not in nombres_tiendas():
+        raise argparse.ArgumentTypeError(f"se espera TIENDA=URL con una de: {', '.join(nombres_tiendas())}")
+    return nombre, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corre muchas búsquedas sin interfaz")
+    parser.add_argument("consultas", help="archivo con una consulta por línea ('-' para la entrada estándar)")
+    parser.add_argument("--salida", help="archivo .jsonl o .parquet ('-' o nada: JSONL a la salida estándar)")
+    parser.add_argument("--formato", choices=FORMATOS_SALIDA, help="por defecto, según la extensión de --salida")
+    parser.add_argument("--tiendas", nargs="+", default=nombres_tiendas(), choices=nombres_tiendas())
+    parser.add_argument("--limite", type=int, default=10, help="resultados por tienda")
+    parser.add_argument("--concurrentes", type=int, default=CONCURRENTES, help="consultas en paralelo")
+    parser.add_argument("--plazo", type=float, help="segundos máximos por tienda (por defecto, el de cada tienda)")
+    parser.add_argument("--url", type=_url, action="append", default=[], metavar="TIENDA=URL",
+                        help="apunta una tienda a otro servidor")
+    parser.add_argument("--registrar", action="store_true", help="guarda los resultados en el historial y el archivo")
+    parser.add_argument("--metricas", help="archivo .json o .prom donde volcar las métricas al terminar")
+    args = parser.parse_args()
+
+    formato = args.formato or formato_de(args.salida)
+    archivo_columnar = None
+    if formato == "parquet" or args.registrar:
+        # pyarrow (y con él pandas) tarda en cargarse; solo se importa si se va a usar
+        import archivo_columnar
+    if formato == "parquet" and (not archivo_columnar.disponible() or args.salida in (None, "-")):
+        parser.error("la salida Parquet necesita pyarrow y un archivo en --salida")
+
+    if args.consultas == "-":
+        consultas = leer_consultas(sys.stdin)
+    else:
+        with open(args.consultas, encoding="utf-8") as f:
+            consultas = leer_consultas(f)
+
+    # Lo que se registra en el historial debe ser una observación nueva
+    sincronizador = Sincronizador(tiendas=args.tiendas, urls=dict(args.url), precios_frescos=args.registrar)
+    plazos = {tienda: args.plazo for tienda in args.tiendas} if args.plazo else None
+    historial = historial_compartido() if args.registrar else None
+    archivo = archivo_columnar.ArchivoColumnar() if args.registrar and archivo_columnar.disponible() else None
+    salida = SalidaParquet(args.salida) if formato == "parquet" else SalidaJSONL(args.salida)
+
+    fallidas = 0
+    productos = 0
+    inicio = time.perf_counter()
+    try:
+        for consulta, resultados, avisos, error, segundos in buscar_lote(
+            consultas, sincronizador, args.tiendas, args.limite, args.concurrentes, plazos
+        ):
+            if error is not None:
+                fallidas += 1
+                print(f"✗ {consulta!r}: {error}", file=sys.stderr)
+                continue
+            salida.escribir(resultados, consulta)
+            if historial is not None:
+                historial.registrar(resultados, consulta=consulta)
+            if archivo is not None:
+                archivo.agregar(resultados, consulta=consulta)
+            productos += len(resultados)
+            aviso = f" ({', '.join(avisos)})" if avisos else ""
+            print(f"✓ {consulta!r}: {len(resultados)} productos en {segundos:.1f} s{aviso}", file=sys.stderr)
+    finally:
+        salida.cerrar()
+        if args.metricas:
+            metricas_compartidas().volcar(args.metricas)
+
+    print(f"{len(consultas)} consultas, {productos} productos, {fallidas} con error "
+          f"en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from metricas import contar
+
+FRESCO_SEGUNDOS = 10 * 60
+MAXIMA_EDAD_SEGUNDOS = 24 * 60 * 60
+MAX_CONSULTAS = 200
+
+
+def normalizar_consulta(consulta):
+    return " ".join(consulta.casefold().split())
+
+
+def clave_busqueda(consulta, tiendas, limite):
+    return normalizar_consulta(consulta), tuple(sorted(set(tiendas))), int(limite)
+
+
+class CacheBusquedas:
+    # Resultados por consulta compartidos entre sesiones del mismo proceso.
+    # Una entrada vieja se sirve de inmediato y se refresca en segundo plano.
+    def __init__(self, fresco=FRESCO_SEGUNDOS, maxima_edad=MAXIMA_EDAD_SEGUNDOS, max_consultas=MAX_CONSULTAS):
+        self.fresco = fresco
+        self.maxima_edad = maxima_edad
+        self.max_consultas = max_consultas
+        self._entradas = OrderedDict()
+        self._refrescando = set()
+        self._candados = {}
+        self._lock = threading.Lock()
+
+    def _vigente(self, clave, ahora):
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if ahora - entrada[1] > self.maxima_edad:
+            del self._entradas[clave]
+            return None
+        self._entradas.move_to_end(clave)
+        return entrada
+
+    def consultar(self, clave, buscar):
+        # Devuelve los resultados guardados (programando un refresco si están viejos)
+        # o None; útil cuando quien llama prefiere transmitir la búsqueda él mismo
+        with self._lock:
+            entrada = self._vigente(clave, time.time())
+            if entrada is None:
+                contar("cache_fallos", cache="busquedas")
+                return None
+            contar("cache_aciertos", cache="busquedas")
+            self._programar_refresco(clave, entrada, buscar)
+            return entrada[0]
+
+    @contextmanager
+    def exclusivo(self, clave):
+        # Evita que varias sesiones repitan a la vez la misma búsqueda: una sola
+        # entra a buscar (y transmitir) la clave; las demás esperan aquí y, al
+        # entrar, la encuentran con guardado(). El candado vive mientras alguien lo use.
+        with self._lock:
+            candado = self._candados.setdefault(clave, [threading.Lock(), 0])
+            candado[1] += 1
+        try:
+            with candado[0]:
+                yield
+        finally:
+            with self._lock:
+                candado[1] -= 1
+                if not candado[1]:
+                    del self._candados[clave]
+
+    def guardado(self, clave):
+        # Lo que otra sesión dejó mientras se esperaba el candado; sin programar refresco
+        with self._lock:
+            entrada = self._vigente(clave, time.time())
+        if entrada is None:
+            return None
+        contar("cache_aciertos", cache="busquedas")
+        return entrada[0]
+
+    def _programar_refresco(self, clave, entrada, buscar):
+        if time.time() - entrada[1] <= self.fresco or clave in self._refrescando:
+            return
+        self._refrescando.add(clave)
+        threading.Thread(target=self._refrescar, args=(clave, buscar), daemon=True).start()
+
+    def _refrescar(self, clave, buscar):
+        try:
+            self.guardar(clave, buscar())
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+
+    def guardar(self, clave, resultados):
+        # Una lista vacía suele ser un bloqueo o un fallo de red: no se memoriza.
+        # Los resultados se comparten entre sesiones sin copiarlos: nadie los modifica.
+        if not resultados:
+            return
+        with self._lock:
+            self._entradas[clave] = (resultados, time.time())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_consultas:
+                self._entradas.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_busquedas_compartida():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheBusquedas()
+        return _cache
@@ -0,0 +1,127 @@
+# Caché HTTP de revalidación: guarda el cuerpo de las páginas que llegan con
+# ETag o Last-Modified y, la próxima vez, la sesión pide la URL con
+# If-None-Match / If-Modified-Since. Un 304 reutiliza el cuerpo guardado y
+# solo viajan las cabeceras.
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from rutas import ruta_datos
+
+RUTA_CACHE_HTTP = ruta_datos("http.sqlite3")
+MAX_BYTES = 100 * 1024 * 1024
+ESCRITURAS_ENTRE_PODAS = 50
+NIVEL_COMPRESION = 1
+
+
+def validadores(respuesta):
+    # None si la respuesta no trae con qué revalidarla o pide no guardarse
+    if "no-store" in respuesta.headers.get("Cache-Control", ""):
+        return None
+    etag = respuesta.headers.get("ETag")
+    ultima_modificacion = respuesta.headers.get("Last-Modified")
+    if not etag and not ultima_modificacion:
+        return None
+    return etag, ultima_modificacion
+
+
+class CacheHTTP:
+    def __init__(self, ruta=RUTA_CACHE_HTTP, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                ultima_modificacion TEXT,
+                tipo TEXT,
+                codificacion TEXT,
+                cuerpo BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                accedido REAL NOT NULL
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_accedido ON respuestas (accedido)")
+
+    def condiciones(self, url):
+        # Cabeceras condicionales para la URL, vacías si no hay nada guardado
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT etag, ultima_modificacion FROM respuestas WHERE url = ?", (url,)
+            ).fetchone()
+        if fila is None:
+            return {}
+        cabeceras = {}
+        if fila[0]:
+            cabeceras["If-None-Match"] = fila[0]
+        if fila[1]:
+            cabeceras["If-Modified-Since"] = fila[1]
+        return cabeceras
+
+    def cuerpo(self, url):
+        # (cuerpo, tipo, codificación) de la última respuesta completa, o None
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT cuerpo, tipo, codificacion FROM respuestas WHERE url = ?", (url,)
+            ).fetchone()
+            if fila is None:
+                return None
+            self._conexion.execute("UPDATE respuestas SET accedido = ? WHERE url = ?", (time.time(), url))
+        return zlib.decompress(fila[0]), fila[1], fila[2]
+
+    def guardar(self, url, respuesta):
+        etiquetas = validadores(respuesta)
+        if etiquetas is None:
+            return False
+        contenido = respuesta.content
+        comprimido = zlib.compress(contenido, NIVEL_COMPRESION)
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas "
+                "(url, etag, ultima_modificacion, tipo, codificacion, cuerpo, tamano, accedido) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, *etiquetas, respuesta.headers.get("Content-Type"), respuesta.encoding,
+                 comprimido, len(comprimido), time.time()),
+            )
+            self._escrituras += 1
+            if self._escrituras >= ESCRITURAS_ENTRE_PODAS:
+                self._escrituras = 0
+                self._podar()
+        return True
+
+    def _podar(self):
+        # Las respuestas usadas hace más tiempo salen primero hasta quedar bajo el límite
+        total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        sobrante = total - self.max_bytes
+        for url, tamano in self._conexion.execute(
+            "SELECT url, tamano FROM respuestas ORDER BY accedido ASC"
+        ).fetchall():
+            if sobrante <= 0:
+                break
+            self._conexion.execute("DELETE FROM respuestas WHERE url = ?", (url,))
+            sobrante -= tamano
+
+    def limpiar(self):
+        with self._lock:
+            self._conexion.execute("DELETE FROM respuestas")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_http_compartida():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheHTTP()
+        return _cache
@@ -0,0 +1,205 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrencia import motor_compartido
+from sesion_http import obtener_sesion
+from cache_http import validadores
+from trafico import host_de
+from metricas import contar
+from rutas import ruta_datos
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DIRECTORIO_IMAGENES = ruta_datos("imagenes")
+LADO_MINIATURA = 140
+MAX_BYTES = 200 * 1024 * 1024
+TIMEOUT_IMAGEN = 5
+# Cada cuánto se pregunta (If-None-Match / If-Modified-Since) si una imagen cambió
+REVALIDAR_SEGUNDOS = 7 * 24 * 60 * 60
+
+_FIRMAS = (
+    (b"\x89PNG", "image/png", ".png"),
+    (b"GIF8", "image/gif", ".gif"),
+    (b"RIFF", "image/webp", ".webp"),
+)
+
+
+def tipo_imagen(datos):
+    for firma, mime, extension in _FIRMAS:
+        if datos.startswith(firma):
+            return mime, extension
+    return "image/jpeg", ".jpg"
+
+
+class CacheImagenes:
+    # Descarga cada imagen una sola vez, guarda una miniatura direccionada por
+    # contenido (sha256) y la comparte entre PDF, HTML y la interfaz. Si la tienda
+    # mandó ETag o Last-Modified, pasado REVALIDAR_SEGUNDOS se revalida con una
+    # petición condicional; un 304 conserva la miniatura sin bajar la imagen.
+    def __init__(self, directorio=DIRECTORIO_IMAGENES, lado=LADO_MINIATURA, max_bytes=MAX_BYTES,
+                 motor=None, sesion=None, revalidar_cada=REVALIDAR_SEGUNDOS):
+        self.directorio = directorio
+        self.revalidar_cada = revalidar_cada
+        self.lado = lado
+        self.max_bytes = max_bytes
+        self.motor = motor or motor_compartido()
+        self.sesion = sesion or obtener_sesion()
+        os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(
+            os.path.join(directorio, "indice.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, archivo TEXT NOT NULL)")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS archivos (
+                archivo TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL,
+                accedido REAL NOT NULL
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_archivos_accedido ON archivos (accedido)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_urls_archivo ON urls (archivo)")
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(urls)")}
+        for columna, tipo in (("etag", "TEXT"), ("ultima_modificacion", "TEXT"),
+                              ("tamano_original", "INTEGER"), ("revisado", "REAL")):
+            if columna not in columnas:
+                self._conexion.execute(f"ALTER TABLE urls ADD COLUMN {columna} {tipo}")
+        self._total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM archivos").fetchone()[0]
+
+    def ruta(self, url):
+        # Ruta local de la miniatura, o None si la imagen no se pudo obtener
+        if not url:
+            return None
+        ahora = time.time()
+        revalidar = None
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT archivo, etag, ultima_modificacion, tamano_original, revisado FROM urls WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if fila is not None:
+                ruta = os.path.join(self.directorio, fila[0])
+                if os.path.exists(ruta):
+                    self._conexion.execute(
+                        "UPDATE archivos SET accedido = ? WHERE archivo = ?", (ahora, fila[0])
+                    )
+                    contar("cache_aciertos", cache="imagenes")
+                    if not (fila[1] or fila[2]) or ahora - (fila[4] or 0) <= self.revalidar_cada:
+                        return ruta
+                    revalidar = (ruta, *fila[1:4])
+        if revalidar:
+            return self._revalidar(url, *revalidar)
+        contar("cache_fallos", cache="imagenes")
+        return self._descargar(url)
+
+    def precargar(self, urls):
+        pendientes = list(dict.fromkeys(url for url in urls if url))
+        return dict(zip(pendientes, self.motor.mapear(self.ruta, pendientes)))
+
+    def _revalidar(self, url, ruta, etag, ultima_modificacion, tamano_original):
+        cabeceras = {}
+        if etag:
+            cabeceras["If-None-Match"] = etag
+        if ultima_modificacion:
+            cabeceras["If-Modified-Since"] = ultima_modificacion
+        try:
+            respuesta = self.sesion.get(url, timeout=TIMEOUT_IMAGEN, headers=cabeceras)
+        except Exception:
+            # Sin red la miniatura guardada sigue sirviendo
+            return ruta
+        host = host_de(url)
+        if respuesta.status_code == 304:
+            with self._lock:
+                self._conexion.execute("UPDATE urls SET revisado = ? WHERE url = ?", (time.time(), url))
+            contar("revalidaciones", host=host, resultado="no_modificado")
+            contar("bytes_ahorrados", tamano_original or 0, host=host)
+            return ruta
+        contar("revalidaciones", host=host, resultado="modificado")
+        return self._guardar(url, respuesta) or ruta
+
+    def _descargar(self, url):
+        try:
+            respuesta = self.sesion.get(url, timeout=TIMEOUT_IMAGEN)
+        except Exception:
+            return None
+        return self._guardar(url, respuesta)
+
+    def _guardar(self, url, respuesta):
+        if respuesta.status_code != 200 or not respuesta.content:
+            return None
+
+        datos = self._miniatura(respuesta.content)
+        huella = hashlib.sha256(datos).hexdigest()
+        archivo = os.path.join(huella[:2], huella + tipo_imagen(datos)[1])
+        ruta = os.path.join(self.directorio, archivo)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, "wb") as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+
+        with self._lock:
+            nuevo = self._conexion.execute(
+                "INSERT OR IGNORE INTO archivos (archivo, tamano, accedido) VALUES (?, ?, ?)",
+                (archivo, len(datos), time.time()),
+            ).rowcount
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO urls (url, archivo, etag, ultima_modificacion, tamano_original, revisado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, archivo, *(validadores(respuesta) or (None, None)), len(respuesta.content), time.time()),
+            )
+            if nuevo:
+                self._total += len(datos)
+                if self._total > self.max_bytes:
+                    self._podar(conservar=archivo)
+        return ruta
+
+    def _miniatura(self, datos):
+        if Image is None:
+            return datos
+        try:
+            with Image.open(io.BytesIO(datos)) as imagen:
+                imagen.thumbnail((self.lado, self.lado))
+                if imagen.mode not in ("RGB", "L"):
+                    imagen = imagen.convert("RGB")
+                salida = io.BytesIO()
+                imagen.save(salida, format="JPEG", quality=85, optimize=True)
+                return salida.getvalue()
+        except Exception:
+            return datos
+
+    def _podar(self, conservar):
+        # Elimina las miniaturas usadas hace más tiempo hasta quedar bajo el límite
+        filas = self._conexion.execute(
+            "SELECT archivo, tamano FROM archivos WHERE archivo != ? ORDER BY accedido ASC", (conservar,)
+        ).fetchall()
+        for archivo, tamano in filas:
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directorio, archivo))
+            except FileNotFoundError:
+                pass
+            self._conexion.execute("DELETE FROM archivos WHERE archivo = ?", (archivo,))
+            self._conexion.execute("DELETE FROM urls WHERE archivo = ?", (archivo,))
+            self._total -= tamano
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_imagenes_compartida():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheImagenes()
+        return _cache
@@ -0,0 +1,122 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote, urlsplit, urlunsplit
+from metricas import contar
+from rutas import ruta_datos
+
+RUTA_CACHE = ruta_datos("productos.sqlite3")
+TTL_SEGUNDOS = 6 * 60 * 60
+MAX_ENTRADAS = 5000
+ESCRITURAS_ENTRE_PODAS = 50
+
+_ASIN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+_ITEM_ML = re.compile(r"(MLM)-?(\d+)", re.IGNORECASE)
+
+
+def clave_producto(url):
+    # ASIN o id de artículo; sirve para deduplicar entre páginas aunque cambie la URL
+    ruta = unquote(url)
+    asin = _ASIN.search(ruta)
+    if asin:
+        return f"amazon:{asin.group(1)}"
+    item = _ITEM_ML.search(urlsplit(url).path)
+    if item:
+        return f"ml:{item.group(1).upper()}{item.group(2)}"
+    return url_canonica(url)
+
+
+def url_canonica(url):
+    # Quita parámetros de rastreo para que el mismo producto comparta entrada
+    partes = urlsplit(url)
+    host = partes.netloc.lower()
+    if "amazon." in host:
+        asin = _ASIN.search(unquote(partes.path + "?" + partes.query))
+        if asin:
+            return f"https://{host}/dp/{asin.group(1)}"
+    elif "mercadolibre." in host and _ITEM_ML.search(partes.path):
+        return urlunsplit(("https", host, partes.path, "", ""))
+    return urlunsplit((partes.scheme or "https", host, partes.path, partes.query, ""))
+
+
+class CacheProductos:
+    def __init__(self, ruta=RUTA_CACHE, ttl=TTL_SEGUNDOS, max_entradas=MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS productos (
+                url TEXT PRIMARY KEY,
+                titulo TEXT,
+                imagen TEXT,
+                precio REAL,
+                guardado REAL NOT NULL,
+                accedido REAL NOT NULL
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_productos_accedido ON productos (accedido)")
+
+    def obtener(self, url):
+        clave = url_canonica(url)
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT titulo, imagen, precio, guardado FROM productos WHERE url = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                contar("cache_fallos", cache="productos")
+                return None
+            if ahora - fila[3] > self.ttl:
+                self._conexion.execute("DELETE FROM productos WHERE url = ?", (clave,))
+                contar("cache_fallos", cache="productos")
+                return None
+            self._conexion.execute("UPDATE productos SET accedido = ? WHERE url = ?", (ahora, clave))
+        contar("cache_aciertos", cache="productos")
+        return fila[0], fila[1], fila[2]
+
+    def guardar(self, url, titulo, imagen=None, precio=None):
+        ahora = time.time()
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO productos (url, titulo, imagen, precio, guardado, accedido) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url_canonica(url), titulo, imagen, precio, ahora, ahora),
+            )
+            self._escrituras += 1
+            if self._escrituras >= ESCRITURAS_ENTRE_PODAS:
+                self._escrituras = 0
+                self._podar(ahora)
+
+    def _podar(self, ahora):
+        # Primero caducados, luego los menos usados recientemente (LRU)
+        self._conexion.execute("DELETE FROM productos WHERE guardado < ?", (ahora - self.ttl,))
+        total = self._conexion.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        if total > self.max_entradas:
+            self._conexion.execute(
+                "DELETE FROM productos WHERE url IN "
+                "(SELECT url FROM productos ORDER BY accedido ASC LIMIT ?)",
+                (total - self.max_entradas,),
+            )
+
+    def limpiar(self):
+        with self._lock:
+            self._conexion.execute("DELETE FROM productos")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_compartida():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheProductos()
+        return _cache
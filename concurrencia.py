@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from trafico import MAX_POR_HOST, ControlTrafico, control_compartido, host_de
+
+MAX_TRABAJADORES = 16
+
+
+class MotorDescargas:
+    # Pool de hilos compartido con un tope de peticiones simultáneas por host.
+    # El tope es adaptativo: la sesión HTTP lo reduce ante 429/503/captcha
+    # a través del mismo ControlTrafico y vuelve a subir con respuestas sanas.
+    # Las tareas de un host sin cupo esperan en su propia cola, fuera del pool,
+    # y la espera por ritmo o pausa se hace con un temporizador: un host frenado
+    # nunca ocupa los hilos que necesitan los demás.
+    def __init__(self, max_trabajadores=MAX_TRABAJADORES, max_por_host=MAX_POR_HOST, limites_host=None, control=None):
+        self.control = control or ControlTrafico(max_por_host, limites_host)
+        self._executor = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix="dealminer")
+        self._en_espera = {}
+        self._lock = threading.Lock()
+
+    def _despachar(self, host):
+        # Pasa al pool (o al temporizador) las tareas del host que caben en su tope
+        concurrencia = self.control.concurrencia(host)
+        while True:
+            with self._lock:
+                cola = self._en_espera.get(host)
+                if not cola or not concurrencia.intentar():
+                    return
+                tarea = cola.popleft()
+            futuro, funcion, url, args = tarea
+            if not futuro.set_running_or_notify_cancel():
+                concurrencia.liberar()
+                continue
+            espera = self.control.reservar_turno(url)
+            if espera > 0:
+                temporizador = threading.Timer(espera, self._lanzar, args=tarea)
+                temporizador.daemon = True
+                temporizador.start()
+            else:
+                self._lanzar(*tarea)
+
+    def _lanzar(self, futuro, funcion, url, args):
+        try:
+            self._executor.submit(self._ejecutar, futuro, funcion, url, args)
+        except RuntimeError as e:
+            # El motor se cerró mientras la tarea esperaba su turno
+            self.control.concurrencia(url).liberar()
+            futuro.set_exception(e)
+
+    def _ejecutar(self, futuro, funcion, url, args):
+        error = None
+        try:
+            with self.control.con_turno(url):
+                resultado = funcion(url, *args)
+        except BaseException as e:
+            error = e
+        # El cupo se libera antes de avisar del resultado para que la siguiente del host ya esté en marcha
+        self.control.concurrencia(url).liberar()
+        self._despachar(host_de(url))
+        if error is not None:
+            futuro.set_exception(error)
+        else:
+            futuro.set_result(resultado)
+
+    def enviar(self, funcion, url, *args):
+        futuro = Future()
+        host = host_de(url)
+        with self._lock:
+            self._en_espera.setdefault(host, deque()).append((futuro, funcion, url, args))
+        self._despachar(host)
+        return futuro
+
+    def mapear(self, funcion, urls, *args):
+        # Conserva el orden de las URLs de entrada
+        futuros = [self.enviar(funcion, url, *args) for url in urls]
+        return [futuro.result() for futuro in futuros]
+
+
+def futuro_resuelto(valor):
+    futuro = Future()
+    futuro.set_result(valor)
+    return futuro
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def motor_compartido():
+    # Un solo pool por proceso: Streamlit recrea la app en cada rerun
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorDescargas(control=control_compartido())
+        return _motor
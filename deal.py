@@ -1,306 +1,314 @@
-import os
-import requests
-import plotly.express as px
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
+from pathlib import Path
 import streamlit as st
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-import io
-import base64
-from dominate import document
-from dominate.tags import *
-
-class Exportador:
-    @staticmethod
-    def generar_pdf(data, query):
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        elements.append(Paragraph(f"Resultados de búsqueda: {query}", styles['Title']))
-        elements.append(Spacer(1, 12))
-
-        for item in data:
-            elements.append(Paragraph(f"Título: {item['Título']}", styles['Heading4']))
-            elements.append(Paragraph(f"Precio: ${item['Precio']:.2f}", styles['Normal']))
-            elements.append(Paragraph(f"Tienda: {item['Tienda']}", styles['Normal']))
-            elements.append(Paragraph(f"Fecha: {item['Fecha']}", styles['Normal']))
-            elements.append(Paragraph(f"URL Producto: {item['URL Producto']}", styles['Normal']))
-
-            if item.get("URL Imagen"):
-                try:
-                    response = requests.get(item["URL Imagen"], stream=True, timeout=5)
-                    if response.status_code == 200:
-                        image_bytes = io.BytesIO(response.content)
-                        img = RLImage(image_bytes, width=100, height=100)
-                        elements.append(img)
-                except Exception as e:
-                    elements.append(Paragraph(f"[No se pudo cargar la imagen: {e}]", styles['Normal']))
-
-            elements.append(Spacer(1, 20))
-
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
-
-    @staticmethod
-    def generar_html(data, query):
-        docu = document(title=f"Reporte {query}")
-
-        with docu.head:
-            style("""
-                body { font-family: Arial, sans-serif; margin: 2rem; background-color: #f5f5f5; color: #333; }
-                h1 { text-align: center; margin-bottom: 2rem; }
-                .product { background-color: #fff; border-radius: 10px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 0.8rem; margin: 1rem auto; display: flex; flex-direction: column; align-items: center; max-width: 500px; }
-                .product img { max-width: 140px; height: auto; border-radius: 5px; margin-bottom: 0.8rem; }
-                .price { color: green; font-weight: bold; margin: 0.3rem 0; }
-                .store, .date { font-size: 0.85rem; color: #666; }
-                a { display: inline-block; margin-top: 0.5rem; text-decoration: none; color: #fff; background-color: #007BFF; padding: 0.3rem 0.8rem; border-radius: 5px; font-size: 0.85rem; transition: background-color 0.3s ease; }
-                a:hover { background-color: #0056b3; }
-                @media (min-width: 768px) {
-                    .product { flex-direction: row; gap: 1rem; max-width: 600px; }
-                    .product img { max-width: 120px; }
-                    .product-details { flex: 1; }
-                }
-            """)
-
-        with docu:
-            h1(f"Resultados para: {query}")
-            for item in data:
-                with div(cls="product"):
-                    if item.get("URL Imagen"):
-                        try:
-                            response = requests.get(item["URL Imagen"], timeout=5)
-                            if response.status_code == 200:
-                                b64_img = base64.b64encode(response.content).decode()
-                                img(src=f"data:image/jpeg;base64,{b64_img}")
-                        except Exception as e:
-                            p(f"[Error cargando imagen: {str(e)}]")
-
-                    with div(cls="product-details"):
-                        h2(item['Título'])
-                        p(f"Tienda: {item['Tienda']}", cls="store")
-                        p(f"Fecha: {item['Fecha']}", cls="date")
-                        p(f"Precio: ${item['Precio']:.2f} {'USD' if item['Tienda'] == 'Amazon' else 'MXN'}", cls="price")
-                        a("Ver producto", href=item['URL Producto'], target="_blank")
-
-        return docu.render()
-
-    @staticmethod
-    def guardar_excel(data, query):
-        df = pd.DataFrame(data)
-        file_name = f"{query.replace(' ', '_')}_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-        df.to_excel(file_name, index=False)
-        return file_name
-
-class Sincronizador:
-    def get_product_info_amazon(self, url):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, features='lxml')
-
-        try:
-            title = soup.find(id='productTitle').get_text(strip=True)
-        except AttributeError:
-            title = 'No title found'
-
-        try:
-            image_url = soup.find(id='landingImage')['src']
-        except (AttributeError, TypeError):
-            image_url = None
-
-        try:
-            price_text = soup.find('span', {'class': 'a-offscreen'}).get_text(strip=True)
-            price = float(price_text.replace('$', '').replace(',', ''))
-        except:
-            price = None
-
-        return title, image_url, price
-
-    def get_search_results_amazon(self, query):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-        url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, features='lxml')
-
-        product_links = []
-        for link in soup.find_all('a', {'class': 'a-link-normal s-no-outline'}, href=True):
-            product_links.append("https://www.amazon.com" + link['href'])
-        return product_links
-
-    def obtener_titulo_desde_pagina(self, url, headers):
-        try:
-            respuesta = requests.get(url, headers=headers)
-            sopa = BeautifulSoup(respuesta.text, "html.parser")
-            titulo_tag = sopa.find("h1", class_="ui-pdp-title")
-            return titulo_tag.text.strip() if titulo_tag else "Sin título"
-        except:
-            return "Sin título"
-
-    def buscar_en_mercado_libre(self, producto: str, limite=10):
-        query = producto.replace(" ", "+")
-        url = f"https://listado.mercadolibre.com.mx/{query}"
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-        respuesta = requests.get(url, headers=headers)
-        sopa = BeautifulSoup(respuesta.text, "html.parser")
-
-        items = sopa.find_all("li", class_="ui-search-layout__item")
-        resultados = []
-
-        for item in items[:limite]:
-            try:
-                enlace_tag = item.find("a", href=True)
-                enlace = enlace_tag["href"] if enlace_tag else None
-                if not enlace:
-                    continue
-
-                titulo = self.obtener_titulo_desde_pagina(enlace, headers)
-
-                precio_entero = item.find("span", class_="andes-money-amount__fraction")
-                precio_decimal = item.find("span", class_="andes-money-amount__cents")
-                if not precio_entero:
-                    continue
-
-                precio = precio_entero.text.replace(",", "")
-                precio_completo = f"{precio}.{precio_decimal.text if precio_decimal else '00'}"
-
-                imagen_tag = item.find("img")
-                imagen = None
-                if imagen_tag:
-                    imagen = (
-                        imagen_tag.get("data-src") or
-                        imagen_tag.get("data-srcset") or
-                        imagen_tag.get("src")
-                    )
-
-                resultados.append({
-                    "Fecha": datetime.now().strftime('%Y-%m-%d'),
-                    "Título": titulo,
-                    "Precio": float(precio_completo),
-                    "URL Imagen": imagen,
-                    "URL Producto": enlace,
-                    "Tienda": "Mercado Libre"
-                })
-            except:
-                continue
-
-        return resultados
+import time
+import bisect
+from cache_busquedas import cache_busquedas_compartida, clave_busqueda
+from cache_imagenes import cache_imagenes_compartida
+from exportador import Exportador
+from sincronizador import MAX_PAGINAS, Sincronizador
+from historial import historial_compartido
+import archivo_columnar
+from vigilante import consultas_compartidas
+from trafico import control_compartido
+from metricas import Metricas, cronometro, metricas_compartidas
+from producto import Lote
+import analisis
+import emparejamiento
+
+MAX_RESULTADOS_POR_TIENDA = 500
+INTERVALO_REFRESCO = 0.5
+# Antigüedad máxima de una captura del vigilante para mostrarla sin volver a buscar
+MAXIMA_EDAD_PRECALCULADO = 2 * 60 * 60
 
 class DealMinerApp:
     def __init__(self):
         st.set_page_config(page_title="DealMiner", page_icon="🛒")
         self.exportador = Exportador()
         self.sincronizador = Sincronizador()
+        # El refresco en segundo plano debe traer precios nuevos, no los de la caché de productos
+        self.refresco = Sincronizador(precios_frescos=True)
+        self.cache_busquedas = cache_busquedas_compartida()
+        self.imagenes = cache_imagenes_compartida()
+        self.historial = historial_compartido()
+        self.archivo = archivo_columnar.ArchivoColumnar() if archivo_columnar.disponible() else None
+        self.consultas_guardadas = consultas_compartidas()
+        self.control = control_compartido()
+        self.metricas = metricas_compartidas()
+        self.tasas = analisis.cargar_tasas()
+
+    def boton_exportar(self, formato, nombre, resultados, query, label, file_name, mime):
+        # Los reportes se construyen al pedirlos, no en cada rerun de la página
+        clave = f"exportar_{formato}_{Exportador.huella(resultados, query)}"
+        if not st.session_state.get(clave):
+            if st.button(f"⚙️ Preparar {nombre}", key=f"{clave}_preparar"):
+                st.session_state[clave] = True
+        if st.session_state.get(clave):
+            with st.spinner(f"Generando {nombre}..."):
+                if formato == "pdf":
+                    barra = st.progress(0.0)
+                    datos = self.exportador.exportar(
+                        formato, resultados, query,
+                        lambda hechos, total: barra.progress(hechos / total, text=f"{hechos}/{total} productos"),
+                    )
+                    barra.empty()
+                else:
+                    datos = self.exportador.exportar(formato, resultados, query)
+            if isinstance(datos, Path):
+                # Reporte grande guardado en disco: se entrega el archivo, no una copia en memoria
+                with datos.open("rb") as archivo:
+                    st.download_button(label=label, data=archivo, file_name=file_name, mime=mime,
+                                       key=f"{clave}_descargar")
+            else:
+                st.download_button(label=label, data=datos, file_name=file_name, mime=mime, key=f"{clave}_descargar")
+
+    def mostrar_resultados(self, resultados_ordenados, miniaturas=None, tabla=None):
+        # Con la tabla de análisis (mismo orden) se agrega el precio convertido y el puntaje
+        miniaturas = miniaturas or {}
+        extras = None
+        if tabla is not None:
+            extras = zip(tabla[self.tasas.columna].to_numpy(), tabla[analisis.COLUMNA_PUNTAJE].to_numpy(),
+                         tabla[analisis.COLUMNA_ATIPICO].to_numpy())
+        for item in resultados_ordenados:
+            precio_base, puntaje, atipico = next(extras) if extras is not None else (None, None, False)
+            try:
+                st.markdown("___")
+                cols = st.columns([1, 3])
+                with cols[0]:
+                    if item.url_imagen:
+                        st.image(miniaturas.get(item.url_imagen) or item.url_imagen, use_container_width=True)
+                with cols[1]:
+                    st.markdown(f"**[{item.titulo}]({item.url_producto})**")
+                    precio = f"💲 **Precio:** {item.moneda} ${item.precio:.2f}"
+                    if pd.notna(precio_base) and item.moneda != self.tasas.base:
+                        precio += f" (≈ {self.tasas.base} ${precio_base:,.2f})"
+                    st.markdown(precio)
+                    if atipico:
+                        st.caption("⚠️ Precio atípico para esta tienda")
+                    elif puntaje is not None and puntaje > 0:
+                        st.markdown(f"🔥 **{puntaje:.0f}%** por debajo de la mediana")
+                    st.markdown(f"🏬 **Tienda:** {item.tienda}")
+                    st.markdown(f"📅 **Fecha:** {item.fecha}")
+            except Exception as e:
+                st.error(f"Error al mostrar un resultado: {e}")
+
+    def mostrar_histograma(self, resultados_ordenados, key, tabla=None):
+        st.markdown("---")
+        st.subheader("Distribución de Precios")
+        # plotly tarda en importarse; solo se carga cuando hay algo que graficar
+        import plotly.express as px
+
+        df = tabla if tabla is not None else analisis.tabla(resultados_ordenados, self.tasas)
+        columna = self.tasas.columna
+        fig = px.histogram(
+            df,
+            x=columna,
+            nbins=20,
+            color="Tienda",
+            marginal="rug",
+            title="Distribución de Precios por Tienda",
+            labels={columna: f"Precio ({self.tasas.base})"},
+            hover_data=df.columns
+        )
+        fig.update_layout(
+            bargap=0.1,
+            xaxis_title=f"Precio ({self.tasas.base})",
+            yaxis_title="Cantidad de Productos",
+            hovermode="x unified"
+        )
+        st.plotly_chart(fig, use_container_width=True, key=key)
+
+    def mostrar_estadisticas(self, tabla):
+        with st.expander(f"📊 Estadísticas por tienda ({self.tasas.base})"):
+            st.dataframe(analisis.estadisticas(tabla).style.format(precision=2), use_container_width=True)
+            tasas = ", ".join(f"1 {moneda} = {tasa:g} {self.tasas.base}"
+                              for moneda, tasa in self.tasas.tasas.items() if moneda != self.tasas.base)
+            st.caption(f"Tasas de {analisis.RUTA_TASAS} (o las predeterminadas): {tasas}")
+
+    def mostrar_mejores(self, grupos):
+        # Solo los productos que aparecen en más de una oferta
+        repetidos = [grupo for grupo in grupos if len(grupo) > 1]
+        if not repetidos:
+            return
+        with st.expander(f"🏷️ Mejor precio por producto ({len(repetidos)} con varias ofertas)"):
+            for grupo in repetidos:
+                mejor = grupo.mejor
+                st.markdown(
+                    f"**[{mejor.titulo}]({mejor.url_producto})** — {mejor.moneda} ${mejor.precio:.2f} en {mejor.tienda}"
+                )
+                otras = ", ".join(
+                    f"[{oferta.moneda} ${oferta.precio:.2f} en {oferta.tienda}]({oferta.url_producto})"
+                    for oferta in grupo.ofertas[1:]
+                )
+                st.caption(f"{len(grupo)} ofertas en {', '.join(grupo.tiendas)}. Otras: {otras}")
+
+    def buscar_y_registrar(self, search_query, tiendas, limite):
+        # Usado por el refresco en segundo plano de la caché de búsquedas
+        resultados = self.refresco.buscar(search_query, tiendas, limite=limite)
+        self.registrar(resultados, search_query)
+        return resultados
+
+    def registrar(self, resultados, search_query):
+        # Cada lote va al historial de precios y, si hay pyarrow, al archivo columnar
+        self.historial.registrar(resultados, consulta=search_query)
+        if self.archivo is not None:
+            self.archivo.agregar(resultados, consulta=search_query)
+
+    def transmitir(self, search_query, tiendas, limite, lista, histograma):
+        # Inserta cada producto en orden conforme llega y repinta a intervalos
+        resultados_ordenados = []
+        ultimo = 0.0
+        vencidas = []
+        fallidas = []
+        for item in self.sincronizador.iterar(search_query, tiendas, limite, vencidas=vencidas, fallidas=fallidas):
+            bisect.insort(resultados_ordenados, item, key=self.tasas.precio_base)
+            ahora = time.monotonic()
+            if ahora - ultimo >= INTERVALO_REFRESCO:
+                ultimo = ahora
+                with cronometro("render", fase="parcial"):
+                    with lista.container():
+                        self.mostrar_resultados(resultados_ordenados)
+                    with histograma.container():
+                        self.mostrar_histograma(resultados_ordenados, key=f"histograma_{len(resultados_ordenados)}")
+        if vencidas:
+            st.warning(f"{', '.join(vencidas)} tardó demasiado; se muestran los resultados que alcanzaron a llegar.")
+        if fallidas:
+            st.warning(f"No se pudo consultar {', '.join(fallidas)}; se muestran las demás tiendas.")
+        return Lote(resultados_ordenados)
+
+    def mostrar_depuracion(self, antes):
+        # Las métricas son del proceso: la diferencia entre instantáneas incluye lo que
+        # otras sesiones y los refrescos en segundo plano hicieron mientras tanto
+        cambios = Metricas.diferencia(antes, self.metricas.instantanea())
+        acumulado = self.metricas.instantanea()
+        with st.expander("🛠️ Depuración", expanded=True):
+            st.markdown("**Actividad del proceso durante esta ejecución**")
+            st.caption("Incluye otras sesiones y refrescos en segundo plano que corrieron al mismo tiempo.")
+            st.dataframe(pd.DataFrame([
+                {"etapa": serie, "veces": datos["conteo"], "total ms": datos["suma"] * 1000,
+                 "promedio ms": datos["suma"] * 1000 / datos["conteo"]}
+                for serie, datos in cambios["etapas"].items()
+            ]), use_container_width=True)
+            st.dataframe(pd.DataFrame(
+                [{"contador": serie, "valor": valor} for serie, valor in cambios["contadores"].items()]
+            ), use_container_width=True)
+
+            st.markdown("**Acumulado del proceso**")
+            st.dataframe(pd.DataFrame([
+                {"etapa": serie, "veces": datos["conteo"], "p50 ms": datos["p50"] * 1000,
+                 "p95 ms": datos["p95"] * 1000, "p99 ms": datos["p99"] * 1000}
+                for serie, datos in acumulado["etapas"].items()
+            ]), use_container_width=True)
+            st.dataframe(pd.DataFrame.from_dict(self.control.resumen(), orient="index"), use_container_width=True)
+
+            st.download_button("Métricas JSON", self.metricas.a_json(), file_name="metricas.json",
+                               mime="application/json", key="metricas_json")
+            st.download_button("Métricas Prometheus", self.metricas.a_prometheus(), file_name="metricas.prom",
+                               mime="text/plain", key="metricas_prometheus")
 
     def run(self):
-        st.title("🛒 Comparador de precios: Amazon + Mercado Libre")
+        depurar = st.sidebar.checkbox("🛠️ Panel de depuración")
+        antes = self.metricas.instantanea() if depurar else None
+        st.title(f"🛒 Comparador de precios: {' + '.join(self.sincronizador.tiendas)}")
         search_query = st.text_input("Introduce tu búsqueda:")
-        tiendas = st.multiselect("Selecciona las tiendas que quieres comparar:", ["Amazon", "Mercado Libre"], default=["Amazon", "Mercado Libre"])
+        disponibles = list(self.sincronizador.tiendas)
+        tiendas = st.multiselect("Selecciona las tiendas que quieres comparar:", disponibles, default=disponibles)
+        # Ninguna tienda puede entregar más de MAX_PAGINAS páginas por búsqueda
+        maximo = min(MAX_RESULTADOS_POR_TIENDA, *(tienda.por_pagina * MAX_PAGINAS
+                                                  for tienda in self.sincronizador.tiendas.values()))
+        limite = st.number_input("Resultados por tienda:", min_value=10, max_value=maximo, value=10, step=10)
 
         if search_query and tiendas:
             st.write(f"### Resultados para: '{search_query}'")
-            resultados = []
-
-            with st.spinner("🔎 Buscando productos..."):
-                if "Amazon" in tiendas:
-                    urls_amazon = self.sincronizador.get_search_results_amazon(search_query)
-                    for url in urls_amazon[:10]:
-                        titulo, imagen, precio = self.sincronizador.get_product_info_amazon(url)
-                        if titulo != 'No title found' and precio is not None:
-                            resultados.append({
-                                "Fecha": datetime.now().strftime('%Y-%m-%d'),
-                                "Título": titulo,
-                                "Precio": precio,
-                                "URL Imagen": imagen,
-                                "URL Producto": url,
-                                "Tienda": "Amazon"
-                            })
-
-                if "Mercado Libre" in tiendas:
-                    resultados.extend(self.sincronizador.buscar_en_mercado_libre(search_query, limite=10))
+            lista = st.empty()
+            histograma = st.empty()
+
+            clave = clave_busqueda(search_query, tiendas, limite)
+            resultados = self.cache_busquedas.consultar(
+                clave, lambda: self.buscar_y_registrar(search_query, tiendas, limite)
+            )
+            if resultados is None:
+                # Solo una sesión busca la misma clave a la vez; las demás esperan y reutilizan su resultado
+                with st.spinner("🔎 Buscando productos..."), self.cache_busquedas.exclusivo(clave):
+                    resultados = self.cache_busquedas.guardado(clave)
+                    if resultados is None:
+                        resultados = self.historial.ultima_captura(
+                            search_query, tiendas, limite=limite, maxima_edad=MAXIMA_EDAD_PRECALCULADO
+                        )
+                        if resultados:
+                            st.caption(f"Precios capturados el {resultados.fechas[0]}")
+                            self.cache_busquedas.guardar(clave, resultados)
+                    if not resultados:
+                        bloqueos = self.control.bloqueos
+                        with cronometro("busqueda"):
+                            resultados = self.transmitir(search_query, tiendas, limite, lista, histograma)
+                        if self.control.bloqueos > bloqueos:
+                            st.warning("Alguna tienda respondió con límites de tráfico o captcha; pueden faltar resultados.")
+                        self.cache_busquedas.guardar(clave, resultados)
+                        self.registrar(resultados, search_query)
 
             if resultados:
-                resultados_ordenados = sorted(resultados, key=lambda x: x["Precio"])
-                for item in resultados_ordenados:
-                    try:
-                        st.markdown("___")
-                        cols = st.columns([1, 3])
-                        with cols[0]:
-                            if item["URL Imagen"]:
-                                st.image(item["URL Imagen"], use_container_width=True)
-                        with cols[1]:
-                            st.markdown(f"**[{item['Título']}]({item['URL Producto']})**")
-                            moneda = "USD" if item["Tienda"] == "Amazon" else "MXN"
-                            st.markdown(f"💲 **Precio:** {moneda} ${item['Precio']:.2f}")
-                            st.markdown(f"🏬 **Tienda:** {item['Tienda']}")
-                            st.markdown(f"📅 **Fecha:** {item['Fecha']}")
-                    except Exception as e:
-                        st.error(f"Error al mostrar un resultado: {e}")
-
-                st.markdown("---")
-                st.subheader("Distribución de Precios")
-
-                df = pd.DataFrame(resultados_ordenados)
-                fig = px.histogram(
-                    df,
-                    x="Precio",
-                    nbins=20,
-                    color="Tienda",
-                    marginal="rug",
-                    title="Distribución de Precios por Tienda",
-                    labels={"Precio": "Precio (USD/MXN)"},
-                    hover_data=df.columns
-                )
-                fig.update_layout(
-                    bargap=0.1,
-                    xaxis_title="Precio",
-                    yaxis_title="Cantidad de Productos",
-                    hovermode="x unified"
+                with cronometro("ordenar"):
+                    resultados_ordenados = analisis.ordenar(resultados, self.tasas)
+                with cronometro("analisis"):
+                    tabla = analisis.tabla(resultados_ordenados, self.tasas)
+                with cronometro("miniaturas"):
+                    miniaturas = self.imagenes.precargar(resultados_ordenados.urls_imagen)
+                with cronometro("render", fase="final"):
+                    with lista.container():
+                        self.mostrar_resultados(resultados_ordenados, miniaturas, tabla)
+                    with histograma.container():
+                        self.mostrar_histograma(resultados_ordenados, key="histograma", tabla=tabla)
+                self.mostrar_estadisticas(tabla)
+                with cronometro("emparejar"):
+                    grupos = emparejamiento.agrupar(resultados_ordenados, tabla[self.tasas.columna].to_numpy())
+                self.mostrar_mejores(grupos)
+
+                fecha = datetime.now().strftime('%Y-%m-%d')
+                base_nombre = search_query.replace(' ', '_')
+                self.boton_exportar(
+                    "excel", "Excel", resultados_ordenados, search_query,
+                    label="📅 Descargar Excel con todos los productos",
+                    file_name=f"{base_nombre}_{fecha}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
-                st.plotly_chart(fig, use_container_width=True)
-
-                # Exportar Excel
-                file_name = self.exportador.guardar_excel(resultados_ordenados, search_query)
-                with open(file_name, "rb") as f:
-                    st.download_button(
-                        label="📅 Descargar Excel con todos los productos",
-                        data=f,
-                        file_name=file_name,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-
-                # Exportar PDF
-                pdf_buffer = self.exportador.generar_pdf(resultados_ordenados, search_query)
-                st.download_button(
+                self.boton_exportar(
+                    "pdf", "PDF", resultados_ordenados, search_query,
                     label="📄 Descargar PDF con los resultados",
-                    data=pdf_buffer,
-                    file_name=f"{search_query.replace(' ', '_')}_{datetime.now().strftime('%Y-%m-%d')}.pdf",
+                    file_name=f"{base_nombre}_{fecha}.pdf",
                     mime="application/pdf"
                 )
-
-                # Exportar HTML
-                html_report = self.exportador.generar_html(resultados_ordenados, search_query)
-                st.download_button(
+                self.boton_exportar(
+                    "html", "HTML", resultados_ordenados, search_query,
                     label="🌐 Descargar HTML offline",
-                    data=html_report,
-                    file_name=f"{search_query.replace(' ', '_')}_reporte.html",
+                    file_name=f"{base_nombre}_reporte.html",
                     mime="text/html"
                 )
+                self.boton_exportar(
+                    "zip", "HTML con imágenes", resultados_ordenados, search_query,
+                    label="📦 Descargar HTML con imágenes (zip)",
+                    file_name=f"{base_nombre}_reporte.zip",
+                    mime="application/zip"
+                )
+                if st.button("👁️ Vigilar esta búsqueda", key=f"vigilar_{clave}"):
+                    self.consultas_guardadas.guardar(search_query, tiendas, limite)
+                    st.success("El vigilante actualizará estos precios periódicamente (python vigilante.py correr).")
+                if archivo_columnar.disponible():
+                    self.boton_exportar(
+                        "parquet", "Parquet", resultados_ordenados, search_query,
+                        label="🗃️ Descargar Parquet",
+                        file_name=f"{base_nombre}_{fecha}.parquet",
+                        mime="application/vnd.apache.parquet"
+                    )
             else:
                 st.warning("No se encontraron resultados para tu búsqueda.")
         elif search_query and not tiendas:
             st.info("Por favor selecciona al menos una tienda.")
 
+        if depurar:
+            self.mostrar_depuracion(antes)
+
 if __name__ == "__main__":
     app = DealMinerApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,193 @@
+# Agrupa ofertas del mismo producto aunque vengan de tiendas distintas.
+# Cada título se reduce a un conjunto de tokens normalizados; su firma MinHash
+# se parte en bandas (LSH) y solo los títulos que coinciden en alguna banda, o
+# que comparten un código de modelo (wh-1000xm5, a2633), se comparan de verdad.
+# Los pares aceptados se unen con union-find, así que el costo crece con el
+# número de candidatos, no con n².
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from producto import Lote, como_lote
+
+BANDAS = 24
+FILAS_POR_BANDA = 3
+PERMUTACIONES = BANDAS * FILAS_POR_BANDA
+UMBRAL_SIMILITUD = 0.45
+# Cubetas más grandes solo juntan títulos genéricos ("audifonos bluetooth negro")
+MAX_POR_CUBETA = 64
+SEMILLA = 20240917
+_PRIMO = (1 << 31) - 1
+
+_PALABRAS_VACIAS = frozenset(
+    "a al and con de del el en for la las los of para por the to un una with y "
+    "new nuevo nueva original envio gratis".split()
+)
+_UNIDADES = re.compile(r"\b(\d+(?:[.,]\d+)?)\s+(gb|tb|mb|mah|w|hz|mm|cm|ml|kg|g|l|in|pulgadas|pulg)\b")
+_TOKENS = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+_DIGITO = re.compile(r"\d").search
+_GUION_MODELO = re.compile(r"\b([a-z]+)-(\d+[a-z0-9]*)\b")
+_CAPACIDAD = re.compile(r"\d+(?:[.,]\d+)?(?:gb|tb|mb|mah|w|hz|mm|cm|ml|kg|g|l|in|pulgadas|pulg)")
+
+_generador = np.random.default_rng(SEMILLA)
+_A = _generador.integers(1, _PRIMO, size=(PERMUTACIONES, 1), dtype=np.uint64)
+_B = _generador.integers(0, _PRIMO, size=(PERMUTACIONES, 1), dtype=np.uint64)
+
+
+def tokens(titulo):
+    # "Audífonos Sony WH-1000XM5, 128 GB" -> {"audifonos", "sony", "wh", "1000xm5", "wh1000xm5", "128gb"}
+    texto = unicodedata.normalize("NFKD", (titulo or "").casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = _UNIDADES.sub(r"\1\2", texto)
+    # "wh-1000xm5" también como "wh1000xm5", que es como lo escriben otras tiendas
+    texto = _GUION_MODELO.sub(r"\1-\2 \1\2", texto)
+    return frozenset(t for t in _TOKENS.findall(texto) if t not in _PALABRAS_VACIAS)
+
+
+def _numericos(conjunto):
+    return frozenset(t for t in conjunto if _DIGITO(t))
+
+
+def modelos(conjunto):
+    # Tokens con letras y dígitos que no son una capacidad (128gb) ni una medida
+    return frozenset(t for t in _numericos(conjunto)
+                     if len(t) >= 4 and not t.isdigit() and not _CAPACIDAD.fullmatch(t))
+
+
+def _hash(token):
+    return zlib.crc32(token.encode()) % _PRIMO
+
+
+def firmas(conjuntos):
+    # Una fila de PERMUTACIONES mínimos por conjunto; los vacíos quedan en None
+    con_tokens = [i for i, conjunto in enumerate(conjuntos) if conjunto]
+    salida = [None] * len(conjuntos)
+    if not con_tokens:
+        return salida
+    hashes = np.fromiter((_hash(t) for i in con_tokens for t in conjuntos[i]), dtype=np.uint64)
+    inicios = np.cumsum([0] + [len(conjuntos[i]) for i in con_tokens[:-1]])
+    # a·h + b < 2^62: cabe en uint64 sin desbordar
+    permutados = (_A * hashes + _B) % _PRIMO
+    minimos = np.minimum.reduceat(permutados, inicios, axis=1).T
+    for i, fila in zip(con_tokens, minimos):
+        salida[i] = fila
+    return salida
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _similares(a, numeros_a, modelos_a, b, numeros_b, modelos_b, umbral):
+    # Modelos o capacidades distintas (128gb vs 256gb, 13 vs 14) no son el mismo
+    # producto: los números de un título deben estar todos en el otro
+    if not (numeros_a <= numeros_b or numeros_b <= numeros_a):
+        return False
+    # Un código de modelo compartido basta aunque el resto del título esté en otro idioma
+    return bool(modelos_a & modelos_b) or jaccard(a, b) >= umbral
+
+
+def similares(a, b, umbral=UMBRAL_SIMILITUD):
+    return _similares(a, _numericos(a), modelos(a), b, _numericos(b), modelos(b), umbral)
+
+
+class ConjuntosDisjuntos:
+    def __init__(self, n):
+        self.padre = list(range(n))
+        self.tamano = [1] * n
+
+    def encontrar(self, i):
+        padre = self.padre
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    def unir(self, i, j):
+        i, j = self.encontrar(i), self.encontrar(j)
+        if i == j:
+            return False
+        if self.tamano[i] < self.tamano[j]:
+            i, j = j, i
+        self.padre[j] = i
+        self.tamano[i] += self.tamano[j]
+        return True
+
+
+def _cubetas(firmas_lote, modelos_lote):
+    for banda in range(BANDAS):
+        inicio = banda * FILAS_POR_BANDA
+        cubetas = {}
+        for i, firma in enumerate(firmas_lote):
+            if firma is not None:
+                cubetas.setdefault(firma[inicio:inicio + FILAS_POR_BANDA].tobytes(), []).append(i)
+        yield from cubetas.values()
+    cubetas = {}
+    for i, codigos in enumerate(modelos_lote):
+        for modelo in codigos:
+            cubetas.setdefault(modelo, []).append(i)
+    yield from cubetas.values()
+
+
+def candidatos(firmas_lote, modelos_lote):
+    # Pares que comparten una banda completa de la firma o un código de modelo;
+    # cada par sale una sola vez aunque coincida en varias bandas
+    vistos = set()
+    for miembros in _cubetas(firmas_lote, modelos_lote):
+        if len(miembros) > MAX_POR_CUBETA:
+            continue
+        for k, i in enumerate(miembros):
+            for j in miembros[k + 1:]:
+                if (i, j) not in vistos:
+                    vistos.add((i, j))
+                    yield i, j
+
+
+@dataclass(slots=True)
+class Grupo:
+    ofertas: Lote
+
+    @property
+    def mejor(self):
+        return self.ofertas[0]
+
+    @property
+    def tiendas(self):
+        return sorted(set(self.ofertas.tiendas))
+
+    def __len__(self):
+        return len(self.ofertas)
+
+
+def agrupar(resultados, precios=None, umbral=UMBRAL_SIMILITUD):
+    # Grupos ordenados por su mejor precio; dentro de cada grupo, la oferta más barata
+    # va primero. "precios" permite comparar en otra escala (p. ej. ya convertidos a
+    # una sola moneda); por defecto se usan los del lote.
+    lote = como_lote(resultados)
+    precios = lote.precios if precios is None else precios
+    # Títulos con los mismos tokens se comparan una sola vez, por su representante
+    representantes = {}
+    de_representante = []
+    for titulo in lote.titulos:
+        de_representante.append(representantes.setdefault(tokens(titulo), len(representantes)))
+    conjuntos = list(representantes)
+    numeros = [_numericos(conjunto) for conjunto in conjuntos]
+    codigos = [modelos(conjunto) for conjunto in conjuntos]
+    uniones = ConjuntosDisjuntos(len(conjuntos))
+    for i, j in candidatos(firmas(conjuntos), codigos):
+        if uniones.encontrar(i) != uniones.encontrar(j) and _similares(
+            conjuntos[i], numeros[i], codigos[i], conjuntos[j], numeros[j], codigos[j], umbral
+        ):
+            uniones.unir(i, j)
+
+    miembros = {}
+    for i, representante in enumerate(de_representante):
+        # Los títulos sin tokens no se parecen a nada, ni entre ellos
+        raiz = uniones.encontrar(representante) if conjuntos[representante] else ("solo", i)
+        miembros.setdefault(raiz, []).append(i)
+    grupos = [sorted(indices, key=precios.__getitem__) for indices in miembros.values()]
+    grupos.sort(key=lambda indices: precios[indices[0]])
+    return [Grupo(lote.tomar(indices)) for indices in grupos]
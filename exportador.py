@@ -0,0 +1,112 @@
+# Reportes descargables (Excel, PDF, HTML, zip, Parquet) generados a pedido y
+# guardados por huella de resultados. No depende de Streamlit.
+import io
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import archivo_columnar
+import reporte_html
+from metricas import contar, cronometro
+from producto import como_lote
+
+MAX_EXPORTES = 16
+# Un reporte que llega como archivo (el PDF) y pasa de este tamaño se guarda en
+# disco y la caché conserva solo su ruta (un Path); los chicos quedan en memoria
+MAX_BYTES_EN_MEMORIA = 8 * 1024 * 1024
+
+
+class Exportador:
+    _exportes = OrderedDict()
+    _exportes_lock = threading.Lock()
+    _directorio = None
+
+    @staticmethod
+    def huella(data, query):
+        return como_lote(data).huella(query)
+
+    @classmethod
+    def exportar(cls, formato, data, query, progreso=None):
+        # Genera el reporte solo cuando se pide y lo reutiliza para el mismo conjunto de resultados
+        data = como_lote(data)
+        clave = (formato, data.huella(query))
+        with cls._exportes_lock:
+            contenido = cls._exportes.get(clave)
+            if contenido is not None and (not isinstance(contenido, Path) or contenido.exists()):
+                cls._exportes.move_to_end(clave)
+                contar("cache_aciertos", cache="exportes")
+                return contenido
+        contar("cache_fallos", cache="exportes")
+
+        generadores = {
+            "excel": cls.generar_excel,
+            "pdf": cls.generar_pdf,
+            "html": cls.generar_html,
+            "zip": cls.generar_zip,
+            "parquet": cls.generar_parquet,
+        }
+        # Solo el PDF informa avance; el resto tarda poco incluso con muchos productos
+        argumentos = {"progreso": progreso} if formato == "pdf" and progreso else {}
+        with cronometro("exportar", formato=formato):
+            contenido = generadores[formato](data, query, **argumentos)
+            if hasattr(contenido, "getvalue"):
+                contenido = contenido.getvalue()
+            elif hasattr(contenido, "read"):
+                with contenido:
+                    contenido = cls._leer_o_guardar(contenido, clave)
+        tamano = contenido.stat().st_size if isinstance(contenido, Path) else len(contenido)
+        contar("bytes_exportados", tamano, formato=formato)
+
+        with cls._exportes_lock:
+            cls._exportes[clave] = contenido
+            while len(cls._exportes) > MAX_EXPORTES:
+                _, viejo = cls._exportes.popitem(last=False)
+                if isinstance(viejo, Path):
+                    viejo.unlink(missing_ok=True)
+        return contenido
+
+    @classmethod
+    def _leer_o_guardar(cls, archivo, clave):
+        archivo.seek(0, os.SEEK_END)
+        tamano = archivo.tell()
+        archivo.seek(0)
+        if tamano <= MAX_BYTES_EN_MEMORIA:
+            return archivo.read()
+        with cls._exportes_lock:
+            if cls._directorio is None:
+                cls._directorio = Path(tempfile.mkdtemp(prefix="dealminer-exportes-"))
+        formato, huella = clave
+        ruta = cls._directorio / f"{huella}.{formato}"
+        # Se escribe aparte y se renombra: otra sesión puede estar leyendo la versión anterior
+        with tempfile.NamedTemporaryFile(dir=cls._directorio, delete=False) as destino:
+            shutil.copyfileobj(archivo, destino)
+        os.replace(destino.name, ruta)
+        return ruta
+
+    @staticmethod
+    def generar_pdf(data, query, progreso=None):
+        # reportlab se carga solo al pedir un PDF
+        import reporte_pdf
+        return reporte_pdf.generar_pdf(data, query, progreso)
+
+    @staticmethod
+    def generar_html(data, query):
+        return reporte_html.generar_html(data, query)
+
+    @staticmethod
+    def generar_zip(data, query):
+        return reporte_html.generar_paquete(data, query)
+
+    @staticmethod
+    def generar_excel(data, query):
+        buffer = io.BytesIO()
+        como_lote(data).a_pandas().to_excel(buffer, index=False)
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def generar_parquet(data, query):
+        return archivo_columnar.parquet_en_memoria(data, query)
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from cache_productos import url_canonica
+from cache_busquedas import normalizar_consulta
+from producto import Lote, como_lote
+from rutas import ruta_datos
+
+RUTA_HISTORIAL = ruta_datos("historial.sqlite3")
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+
+def _fecha(valor, fin_del_dia=False):
+    # Un día sin hora (date o 'YYYY-MM-DD') como límite superior cubre el día completo
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return f"{valor} 23:59:59" if fin_del_dia and len(valor) == 10 else valor
+    if not isinstance(valor, datetime):
+        valor = datetime.combine(valor, datetime.max.time() if fin_del_dia else datetime.min.time())
+    return valor.strftime(FORMATO_FECHA)
+
+
+def _ventana(desde, hasta, dias):
+    if dias is not None and desde is None:
+        desde = datetime.now() - timedelta(days=dias)
+    return _fecha(desde) or "0000", _fecha(hasta, fin_del_dia=True) or "9999"
+
+
+class HistorialPrecios:
+    # Serie de precios por producto en SQLite (WAL). Cada búsqueda se inserta en
+    # un solo lote; las consultas por producto o tienda usan índices con la fecha.
+    def __init__(self, ruta=RUTA_HISTORIAL):
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS precios (
+                id INTEGER PRIMARY KEY,
+                consulta TEXT,
+                tienda TEXT NOT NULL,
+                url_producto TEXT NOT NULL,
+                titulo TEXT,
+                precio REAL NOT NULL,
+                imagen TEXT,
+                fecha TEXT NOT NULL
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_precios_producto_fecha ON precios (url_producto, fecha)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_precios_tienda_fecha ON precios (tienda, fecha)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_precios_consulta_tienda_fecha ON precios (consulta, tienda, fecha)")
+        self._conexion.commit()
+
+    def registrar(self, resultados, consulta=None, fecha=None):
+        fecha = _fecha(fecha or datetime.now())
+        consulta = normalizar_consulta(consulta) if consulta else consulta
+        lote = como_lote(resultados)
+        filas = [
+            (consulta, tienda, url_canonica(url), titulo, precio, imagen, fecha)
+            for tienda, url, titulo, precio, imagen
+            in zip(lote.tiendas, lote.urls_producto, lote.titulos, lote.precios, lote.urls_imagen)
+        ]
+        if not filas:
+            return 0
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT INTO precios (consulta, tienda, url_producto, titulo, precio, imagen, fecha) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                filas,
+            )
+        return len(filas)
+
+    def _estadisticas(self, columna, valor, desde, hasta, dias):
+        inicio, fin = _ventana(desde, hasta, dias)
+        with self._lock:
+            fila = self._conexion.execute(
+                f"SELECT MIN(precio), MAX(precio), AVG(precio), COUNT(*) FROM precios "
+                f"WHERE {columna} = ? AND fecha BETWEEN ? AND ?",
+                (valor, inicio, fin),
+            ).fetchone()
+        return {"minimo": fila[0], "maximo": fila[1], "promedio": fila[2], "registros": fila[3]}
+
+    def estadisticas_producto(self, url, desde=None, hasta=None, dias=None):
+        return self._estadisticas("url_producto", url_canonica(url), desde, hasta, dias)
+
+    def estadisticas_tienda(self, tienda, desde=None, hasta=None, dias=None):
+        return self._estadisticas("tienda", tienda, desde, hasta, dias)
+
+    def serie_producto(self, url, desde=None, hasta=None, dias=None):
+        inicio, fin = _ventana(desde, hasta, dias)
+        with self._lock:
+            return self._conexion.execute(
+                "SELECT fecha, precio FROM precios WHERE url_producto = ? AND fecha BETWEEN ? AND ? ORDER BY fecha",
+                (url_canonica(url), inicio, fin),
+            ).fetchall()
+
+    def ultima_captura(self, consulta, tiendas, limite=None, maxima_edad=None):
+        # Último lote registrado de cada tienda para la consulta; None si alguna
+        # tienda no tiene uno, es más viejo que maxima_edad (en segundos) o trae
+        # menos de `limite` productos (se capturó con un límite menor)
+        consulta = normalizar_consulta(consulta)
+        minima = _fecha(datetime.now() - timedelta(seconds=maxima_edad)) if maxima_edad else "0000"
+        columnas = ([], [], [], [], [], [])
+        with self._lock:
+            for tienda in tiendas:
+                fecha = self._conexion.execute(
+                    "SELECT MAX(fecha) FROM precios WHERE consulta = ? AND tienda = ?",
+                    (consulta, tienda),
+                ).fetchone()[0]
+                if fecha is None or fecha < minima:
+                    return None
+                filas = self._conexion.execute(
+                    "SELECT titulo, precio, imagen, url_producto FROM precios "
+                    "WHERE consulta = ? AND tienda = ? AND fecha = ? ORDER BY id LIMIT ?",
+                    (consulta, tienda, fecha, -1 if limite is None else int(limite)),
+                ).fetchall()
+                if limite is not None and len(filas) < limite:
+                    return None
+                for titulo, precio, imagen, url in filas:
+                    for columna, valor in zip(columnas, (titulo, precio, url, tienda, imagen, fecha)):
+                        columna.append(valor)
+        return Lote.de_columnas(*columnas)
+
+
+_historial = None
+_historial_lock = threading.Lock()
+
+
+def historial_compartido():
+    global _historial
+    with _historial_lock:
+        if _historial is None:
+            _historial = HistorialPrecios()
+        return _historial
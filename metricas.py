@@ -0,0 +1,152 @@
+# Métricas del proceso: tiempos por etapa (descarga, parseo, exportación...) y
+# contadores (bytes descargados, aciertos de caché, fallos de parseo). Se
+# consultan desde el panel de depuración o se vuelcan en JSON / texto Prometheus.
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MUESTRAS_POR_ETAPA = 2048
+CUANTILES = (0.5, 0.95, 0.99)
+PREFIJO = "dealminer"
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _escapar(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def nombre_serie(nombre, pares):
+    return nombre + _etiquetas(pares)
+
+
+def _cuantil(ordenadas, q):
+    if not ordenadas:
+        return None
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+class Metricas:
+    def __init__(self, muestras=MUESTRAS_POR_ETAPA):
+        self.muestras = muestras
+        self._contadores = {}
+        # clave -> [conteo, suma, últimas muestras]
+        self._etapas = {}
+        self._lock = threading.Lock()
+
+    def contar(self, nombre, valor=1, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, etapa, segundos, **etiquetas):
+        clave = _clave(etapa, etiquetas)
+        with self._lock:
+            registro = self._etapas.get(clave)
+            if registro is None:
+                registro = self._etapas[clave] = [0, 0.0, deque(maxlen=self.muestras)]
+            registro[0] += 1
+            registro[1] += segundos
+            registro[2].append(segundos)
+
+    @contextmanager
+    def cronometro(self, etapa, **etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio, **etiquetas)
+
+    def instantanea(self):
+        # {"contadores": {serie: valor}, "etapas": {serie: {conteo, suma, p50, p95, p99}}}
+        with self._lock:
+            contadores = dict(self._contadores)
+            etapas = {clave: (r[0], r[1], sorted(r[2])) for clave, r in self._etapas.items()}
+        return {
+            "contadores": {nombre_serie(*clave): valor for clave, valor in sorted(contadores.items())},
+            "etapas": {
+                nombre_serie(*clave): {
+                    "conteo": conteo,
+                    "suma": suma,
+                    **{f"p{int(q * 100)}": _cuantil(ordenadas, q) for q in CUANTILES},
+                }
+                for clave, (conteo, suma, ordenadas) in sorted(etapas.items())
+            },
+        }
+
+    @staticmethod
+    def diferencia(antes, despues):
+        # Lo ocurrido entre dos instantáneas (solo conteos y sumas)
+        contadores = {
+            serie: valor - antes["contadores"].get(serie, 0)
+            for serie, valor in despues["contadores"].items()
+            if valor != antes["contadores"].get(serie, 0)
+        }
+        etapas = {}
+        for serie, datos in despues["etapas"].items():
+            previo = antes["etapas"].get(serie, {"conteo": 0, "suma": 0.0})
+            if datos["conteo"] != previo["conteo"]:
+                etapas[serie] = {
+                    "conteo": datos["conteo"] - previo["conteo"],
+                    "suma": datos["suma"] - previo["suma"],
+                }
+        return {"contadores": contadores, "etapas": etapas}
+
+    def a_json(self):
+        return json.dumps(self.instantanea(), ensure_ascii=False, indent=2)
+
+    def a_prometheus(self):
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            etapas = sorted((clave, (r[0], r[1], sorted(r[2]))) for clave, r in self._etapas.items())
+        lineas = []
+        for nombre in dict.fromkeys(nombre for (nombre, _), _ in contadores):
+            lineas.append(f"# TYPE {PREFIJO}_{nombre}_total counter")
+            for (serie, pares), valor in contadores:
+                if serie == nombre:
+                    lineas.append(f"{PREFIJO}_{nombre}_total{_etiquetas(pares)} {valor}")
+        if etapas:
+            metrica = f"{PREFIJO}_etapa_segundos"
+            lineas.append(f"# TYPE {metrica} summary")
+            for (etapa, pares), (conteo, suma, ordenadas) in etapas:
+                pares = (("etapa", etapa),) + pares
+                for q in CUANTILES:
+                    lineas.append(f"{metrica}{_etiquetas(pares + (('quantile', str(q)),))} {_cuantil(ordenadas, q)}")
+                lineas.append(f"{metrica}_sum{_etiquetas(pares)} {suma}")
+                lineas.append(f"{metrica}_count{_etiquetas(pares)} {conteo}")
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, ruta):
+        # .json para JSON; cualquier otra extensión, texto de Prometheus (node_exporter textfile)
+        contenido = self.a_json() if ruta.endswith(".json") else self.a_prometheus()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+
+
+_metricas = Metricas()
+
+
+def metricas_compartidas():
+    return _metricas
+
+
+def contar(nombre, valor=1, **etiquetas):
+    _metricas.contar(nombre, valor, **etiquetas)
+
+
+def cronometro(etapa, **etiquetas):
+    return _metricas.cronometro(etapa, **etiquetas)
@@ -0,0 +1,169 @@
+from bs4 import BeautifulSoup
+from precios import precio
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+PARSER_BS = "lxml" if lxml_html is not None else "html.parser"
+
+
+def _clase(nombre):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nombre} ')"
+
+
+# XPath precompiladas: solo se recorren los nodos que interesan
+if etree is not None:
+    _XP_TITULO_AMAZON = etree.XPath("//*[@id='productTitle']")
+    _XP_IMAGEN_AMAZON = etree.XPath("//*[@id='landingImage']/@src")
+    _XP_PRECIO_AMAZON = etree.XPath(f"//span[{_clase('a-offscreen')}]")
+    _XP_ENLACES_AMAZON = etree.XPath(f"//a[@href and {_clase('a-link-normal')} and {_clase('s-no-outline')}]/@href")
+    _XP_TITULO_ML = etree.XPath(f"//h1[{_clase('ui-pdp-title')}]")
+    _XP_ITEMS_ML = etree.XPath(f"//li[{_clase('ui-search-layout__item')}]")
+    _XP_ENLACE_ITEM_ML = etree.XPath(".//a[@href]/@href")
+    _XP_TITULO_ITEM_ML = etree.XPath(f".//*[{_clase('poly-component__title')} or {_clase('ui-search-item__title')}]")
+    _XP_ENTERO_ML = etree.XPath(f".//span[{_clase('andes-money-amount__fraction')}]")
+    _XP_CENTAVOS_ML = etree.XPath(f".//span[{_clase('andes-money-amount__cents')}]")
+    _XP_IMAGEN_ML = etree.XPath(".//img")
+
+
+def _arbol(html):
+    return lxml_html.fromstring(html)
+
+
+def _con_respaldo(rapido, respaldo, html, *args):
+    # Ruta lxml/XPath; si lxml no está instalado o falla, se usa el parseo completo con BeautifulSoup
+    if lxml_html is not None and html:
+        try:
+            return rapido(html, *args)
+        except Exception:
+            pass
+    return respaldo(html, *args)
+
+
+def _texto(nodos):
+    return nodos[0].text_content().strip() if nodos else None
+
+
+def _producto_amazon_lxml(html):
+    arbol = _arbol(html)
+    title = _texto(_XP_TITULO_AMAZON(arbol)) or 'No title found'
+    imagenes = _XP_IMAGEN_AMAZON(arbol)
+    image_url = str(imagenes[0]) if imagenes else None
+    price = precio(_texto(_XP_PRECIO_AMAZON(arbol)))
+    return title, image_url, price
+
+
+def _producto_amazon_bs(html):
+    soup = BeautifulSoup(html, features=PARSER_BS)
+
+    try:
+        title = soup.find(id='productTitle').get_text(strip=True)
+    except AttributeError:
+        title = 'No title found'
+
+    try:
+        image_url = soup.find(id='landingImage')['src']
+    except (AttributeError, TypeError):
+        image_url = None
+
+    try:
+        price = precio(soup.find('span', {'class': 'a-offscreen'}).get_text(strip=True))
+    except AttributeError:
+        price = None
+
+    return title, image_url, price
+
+
+def producto_amazon(html):
+    return _con_respaldo(_producto_amazon_lxml, _producto_amazon_bs, html)
+
+
+def _enlaces_amazon_lxml(html):
+    return [str(href) for href in _XP_ENLACES_AMAZON(_arbol(html))]
+
+
+def _enlaces_amazon_bs(html):
+    soup = BeautifulSoup(html, features=PARSER_BS)
+    return [link['href'] for link in soup.find_all('a', {'class': 'a-link-normal s-no-outline'}, href=True)]
+
+
+def enlaces_amazon(html):
+    return _con_respaldo(_enlaces_amazon_lxml, _enlaces_amazon_bs, html)
+
+
+def _titulo_mercado_libre_lxml(html):
+    return _texto(_XP_TITULO_ML(_arbol(html)))
+
+
+def _titulo_mercado_libre_bs(html):
+    titulo_tag = BeautifulSoup(html, "html.parser").find("h1", class_="ui-pdp-title")
+    return titulo_tag.text.strip() if titulo_tag else None
+
+
+def titulo_mercado_libre(html):
+    return _con_respaldo(_titulo_mercado_libre_lxml, _titulo_mercado_libre_bs, html)
+
+
+CLASES_TITULO_ITEM_ML = ["poly-component__title", "ui-search-item__title"]
+
+
+def _item_ml(enlace, titulo, entero, centavos, imagen):
+    return {
+        "enlace": enlace,
+        "titulo": titulo or None,
+        "precio_entero": entero,
+        "precio_decimal": centavos,
+        "imagen": imagen,
+    }
+
+
+def _items_mercado_libre_lxml(html, limite):
+    items = []
+    for item in _XP_ITEMS_ML(_arbol(html))[:limite]:
+        enlaces = _XP_ENLACE_ITEM_ML(item)
+        imagenes = _XP_IMAGEN_ML(item)
+        imagen = None
+        if imagenes:
+            imagen = imagenes[0].get("data-src") or imagenes[0].get("data-srcset") or imagenes[0].get("src")
+        items.append(_item_ml(
+            str(enlaces[0]) if enlaces else None,
+            _texto(_XP_TITULO_ITEM_ML(item)),
+            _texto(_XP_ENTERO_ML(item)),
+            _texto(_XP_CENTAVOS_ML(item)),
+            imagen,
+        ))
+    return items
+
+
+def _items_mercado_libre_bs(html, limite):
+    sopa = BeautifulSoup(html, "html.parser")
+    items = []
+    for item in sopa.find_all("li", class_="ui-search-layout__item")[:limite]:
+        enlace_tag = item.find("a", href=True)
+        titulo_tag = item.find(class_=CLASES_TITULO_ITEM_ML)
+        precio_entero = item.find("span", class_="andes-money-amount__fraction")
+        precio_decimal = item.find("span", class_="andes-money-amount__cents")
+        imagen_tag = item.find("img")
+        imagen = None
+        if imagen_tag:
+            imagen = (
+                imagen_tag.get("data-src") or
+                imagen_tag.get("data-srcset") or
+                imagen_tag.get("src")
+            )
+        items.append(_item_ml(
+            enlace_tag["href"] if enlace_tag else None,
+            titulo_tag.get_text(strip=True) if titulo_tag else None,
+            precio_entero.text.strip() if precio_entero else None,
+            precio_decimal.text.strip() if precio_decimal else None,
+            imagen,
+        ))
+    return items
+
+
+def items_mercado_libre(html, limite=None):
+    return _con_respaldo(_items_mercado_libre_lxml, _items_mercado_libre_bs, html, limite)
@@ -0,0 +1,84 @@
+# Lectura de precios escritos como texto, para todas las tiendas:
+#   "$1,299.00", "MX$ 1.299,50", "US$12", "1 299,00 €", "$10.99 - $24.99", "12,5"
+# Una expresión compilada encuentra los importes y el separador decimal se
+# decide por la forma del número, así que sirve igual para en-US / es-MX
+# ("1,299.50") que para es-AR / pt-BR / de ("1.299,50") o fr ("1 299,50"):
+#   - si aparecen "." y ",", el último es el decimal
+#   - un separador repetido ("1.299.000") agrupa miles
+#   - uno solo seguido de exactamente tres dígitos agrupa miles ("1.299" -> 1299),
+#     salvo con parte entera 0 ("0,750"); con otra cantidad de dígitos es decimal
+# En un rango ("$10 - $20") se toma el primer importe, el menor.
+import re
+
+_IMPORTE = re.compile(
+    r"(?<![\d.,])"
+    r"(\d{1,3}(?:[ \u00a0\u202f']\d{3})+(?:[.,]\d+)?"  # miles separados por espacio o apóstrofo
+    r"|\d[\d.,]*)"
+)
+_AGRUPACION = re.compile(r"[ \u00a0\u202f']")
+
+
+def _miles(entero, separador):
+    # "1.299.000" -> "1299000"; None si los grupos no son de tres dígitos
+    partes = entero.split(separador)
+    if not partes[0] or any(len(parte) != 3 for parte in partes[1:]):
+        return None
+    return "".join(partes)
+
+
+def _normalizar(numero):
+    numero = _AGRUPACION.sub("", numero).rstrip(".,")
+    puntos, comas = numero.count("."), numero.count(",")
+    if puntos and comas:
+        decimal = "." if numero.rfind(".") > numero.rfind(",") else ","
+        entero, _, fraccion = numero.rpartition(decimal)
+        entero = _miles(entero, "," if decimal == "." else ".")
+        return None if entero is None else float(f"{entero}.{fraccion}")
+    separador = "." if puntos else "," if comas else None
+    if separador is None:
+        return float(numero)
+    if numero.count(separador) > 1:
+        entero = _miles(numero, separador)
+        return None if entero is None else float(entero)
+    entero, fraccion = numero.split(separador)
+    if len(fraccion) == 3 and entero.strip("0"):
+        return float(entero + fraccion)
+    return float(f"{entero or 0}.{fraccion}")
+
+
+def precio(texto):
+    # Primer importe del texto o None si no hay ninguno
+    if not texto:
+        return None
+    for numero in _IMPORTE.findall(texto):
+        try:
+            valor = _normalizar(numero)
+        except ValueError:
+            continue
+        if valor is not None:
+            return valor
+    return None
+
+
+def precio_partido(entero, centavos=None):
+    # Precio que la página separa en parte entera y centavos (Mercado Libre)
+    valor = precio(entero)
+    if valor is None or not centavos:
+        return valor
+    centavos = centavos.strip()
+    if not centavos.isdigit():
+        return valor
+    return valor + int(centavos) / 10 ** len(centavos)
+
+
+def precios(textos):
+    # Lote de textos -> lista de float/None. Los textos repetidos (muy comunes en un
+    # listado) se leen una sola vez.
+    vistos = {}
+    salida = []
+    for texto in textos:
+        valor = vistos.get(texto, vistos)
+        if valor is vistos:
+            valor = vistos[texto] = precio(texto)
+        salida.append(valor)
+    return salida
@@ -0,0 +1,156 @@
+import hashlib
+import json
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+
+FORMATO_FECHA_LOTE = '%Y-%m-%d'
+# Encabezados que ve el usuario en Excel, el histograma y las tablas
+COLUMNAS = {
+    "fechas": "Fecha",
+    "titulos": "Título",
+    "precios": "Precio",
+    "urls_imagen": "URL Imagen",
+    "urls_producto": "URL Producto",
+    "tiendas": "Tienda",
+}
+
+
+def fecha_lote(momento=None):
+    # Una sola cadena por búsqueda; todos los productos del lote la comparten
+    return (momento or datetime.now()).strftime(FORMATO_FECHA_LOTE)
+
+
+@dataclass(slots=True)
+class Producto:
+    titulo: str
+    precio: float
+    url_producto: str
+    tienda: str
+    url_imagen: str = None
+    fecha: str = None
+
+    @property
+    def moneda(self):
+        # Import tardío: tiendas trae bs4/lxml, que este módulo no necesita
+        from tiendas import moneda_de
+        return moneda_de(self.tienda)
+
+    @classmethod
+    def de_registro(cls, registro):
+        # Dict con los encabezados de COLUMNAS (formato de los scripts anteriores)
+        return cls(
+            registro["Título"],
+            registro["Precio"],
+            registro["URL Producto"],
+            registro["Tienda"],
+            registro.get("URL Imagen"),
+            registro.get("Fecha"),
+        )
+
+
+class Lote:
+    # Resultados de una búsqueda guardados por columnas: una lista por campo y los
+    # precios en un array de doubles que NumPy/pandas/Arrow leen sin copiar.
+    # Una vez convertido a DataFrame o Arrow no debe crecer (el array queda exportado).
+    __slots__ = ("titulos", "precios", "urls_producto", "tiendas", "urls_imagen", "fechas")
+
+    def __init__(self, productos=()):
+        self.titulos = []
+        self.precios = array("d")
+        self.urls_producto = []
+        self.tiendas = []
+        self.urls_imagen = []
+        self.fechas = []
+        for producto in productos:
+            self.agregar(producto)
+
+    @classmethod
+    def de_registros(cls, registros):
+        return cls(Producto.de_registro(registro) for registro in registros if registro.get("Precio") is not None)
+
+    @classmethod
+    def de_columnas(cls, titulos, precios, urls_producto, tiendas, urls_imagen, fechas):
+        lote = cls()
+        lote.titulos = list(titulos)
+        lote.precios = array("d", precios)
+        lote.urls_producto = list(urls_producto)
+        lote.tiendas = list(tiendas)
+        lote.urls_imagen = list(urls_imagen)
+        lote.fechas = list(fechas)
+        return lote
+
+    def agregar(self, producto):
+        self.titulos.append(producto.titulo)
+        self.precios.append(producto.precio)
+        self.urls_producto.append(producto.url_producto)
+        self.tiendas.append(producto.tienda)
+        self.urls_imagen.append(producto.url_imagen)
+        self.fechas.append(producto.fecha)
+
+    def __len__(self):
+        return len(self.precios)
+
+    def __bool__(self):
+        return len(self.precios) > 0
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return self.tomar(range(len(self))[indice])
+        return Producto(
+            self.titulos[indice], self.precios[indice], self.urls_producto[indice],
+            self.tiendas[indice], self.urls_imagen[indice], self.fechas[indice],
+        )
+
+    def __iter__(self):
+        return map(Producto, self.titulos, self.precios, self.urls_producto,
+                   self.tiendas, self.urls_imagen, self.fechas)
+
+    def tomar(self, indices):
+        indices = list(indices)
+        return Lote.de_columnas(
+            [self.titulos[i] for i in indices],
+            [self.precios[i] for i in indices],
+            [self.urls_producto[i] for i in indices],
+            [self.tiendas[i] for i in indices],
+            [self.urls_imagen[i] for i in indices],
+            [self.fechas[i] for i in indices],
+        )
+
+    def columnas(self):
+        return {campo: getattr(self, campo) for campo in COLUMNAS}
+
+    def huella(self, *extra):
+        contenido = json.dumps([extra, {campo: list(valores) for campo, valores in self.columnas().items()}],
+                               default=str, ensure_ascii=False)
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+    def _precios_numpy(self):
+        import numpy as np
+        return np.frombuffer(self.precios, dtype=np.float64) if self.precios else np.empty(0)
+
+    def a_pandas(self):
+        import pandas as pd
+        datos = {encabezado: getattr(self, campo) for campo, encabezado in COLUMNAS.items()}
+        datos["Precio"] = self._precios_numpy()
+        return pd.DataFrame(datos, copy=False)
+
+    def a_arrow(self):
+        import pyarrow as pa
+        return pa.table({
+            "fecha": pa.array(self.fechas, pa.string()),
+            "tienda": pa.array(self.tiendas, pa.string()),
+            "titulo": pa.array(self.titulos, pa.string()),
+            "precio": pa.array(self._precios_numpy()),
+            "url_producto": pa.array(self.urls_producto, pa.string()),
+            "url_imagen": pa.array(self.urls_imagen, pa.string()),
+        })
+
+
+def como_lote(resultados):
+    if isinstance(resultados, Lote):
+        return resultados
+    resultados = list(resultados)
+    if resultados and isinstance(resultados[0], dict):
+        return Lote.de_registros(resultados)
+    return Lote(resultados)
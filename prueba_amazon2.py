@@ -1,9 +1,9 @@
-import os
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime
 import streamlit as st
+from sesion_http import Bloqueado, obtener_sesion
+from historial import historial_compartido, RUTA_HISTORIAL
 
 def get_product_info(url):
     headers = {
@@ -11,7 +11,10 @@ def get_product_info(url):
         'Accept-Language': 'en-US,en;q=0.9'
     }
 
-    response = requests.get(url, headers=headers)
+    try:
+        response = obtener_sesion().get(url, headers=headers)
+    except Bloqueado:
+        return 'No title found', None, None
     soup = BeautifulSoup(response.text, features='lxml')
 
     try:
@@ -32,15 +35,13 @@ def get_product_info(url):
 
     return title, image_url, price
 
-def save_to_excel(data):
-    df = pd.DataFrame(data)
+def save_to_excel(data, query=None):
+    # El acumulado vive en el historial SQLite; el Excel solo lleva esta búsqueda
+    historial_compartido().registrar(
+        [dict(item, Tienda=item.get("Tienda", "Amazon")) for item in data], consulta=query
+    )
     file_name = "busquedas.xlsx"
-
-    if os.path.exists(file_name):
-        existing_df = pd.read_excel(file_name)
-        df = pd.concat([existing_df, df], ignore_index=True)
-
-    df.to_excel(file_name, index=False)
+    pd.DataFrame(data).to_excel(file_name, index=False)
     return file_name
 
 def get_search_results(query):
@@ -50,7 +51,10 @@ def get_search_results(query):
     }
 
     url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"
-    response = requests.get(url, headers=headers)
+    try:
+        response = obtener_sesion().get(url, headers=headers)
+    except Bloqueado:
+        return []
     soup = BeautifulSoup(response.text, features='lxml')
 
     product_links = []
@@ -99,7 +103,7 @@ if search_query:
                     st.markdown(f"📅 Fecha: {item['Fecha']}")
 
             # Botón de descarga del Excel
-            file_name = save_to_excel(all_data)
+            file_name = save_to_excel(all_data, search_query)
             with open(file_name, "rb") as f:
                 st.download_button(
                     label="📥 Descargar Excel",
@@ -108,7 +112,7 @@ if search_query:
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
 
-            st.success(f"✅ Datos guardados en {file_name}")
+            st.success(f"✅ Datos guardados en {RUTA_HISTORIAL}")
         else:
             st.error("❌ No se encontraron productos válidos.")
     else:
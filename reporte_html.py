@@ -0,0 +1,170 @@
+# Reporte HTML a partir de plantillas compiladas una sola vez, con escape de
+# html.escape. Dos modos:
+#   - un solo archivo: cada miniatura distinta se incrusta una vez como clase CSS
+#     y las tarjetas que la repiten solo la referencian
+#   - paquete zip: index.html + imagenes/<sha256>.<ext>, una por contenido
+# Los productos se reparten en páginas que un script corto muestra de a una;
+# sin JavaScript se ven todas.
+import base64
+import io
+import os
+import zipfile
+from html import escape
+from string import Template
+
+from cache_imagenes import cache_imagenes_compartida, tipo_imagen
+from producto import como_lote
+
+PRODUCTOS_POR_PAGINA = 50
+
+ESTILO = """
+body { font-family: Arial, sans-serif; margin: 2rem; background-color: #f5f5f5; color: #333; }
+h1 { text-align: center; margin-bottom: 2rem; }
+.product { background-color: #fff; border-radius: 10px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 0.8rem; margin: 1rem auto; display: flex; flex-direction: column; align-items: center; max-width: 500px; content-visibility: auto; contain-intrinsic-size: auto 220px; }
+.product img, .product .thumb { width: 140px; max-width: 140px; height: auto; border-radius: 5px; margin-bottom: 0.8rem; }
+.product .thumb { height: 140px; background: center / contain no-repeat; }
+.price { color: green; font-weight: bold; margin: 0.3rem 0; }
+.store, .date { font-size: 0.85rem; color: #666; }
+a { display: inline-block; margin-top: 0.5rem; text-decoration: none; color: #fff; background-color: #007BFF; padding: 0.3rem 0.8rem; border-radius: 5px; font-size: 0.85rem; transition: background-color 0.3s ease; }
+a:hover { background-color: #0056b3; }
+.paginas { text-align: center; margin: 1rem 0; }
+.paginas button { margin: 0.15rem; padding: 0.3rem 0.6rem; border: 1px solid #007BFF; background: #fff; color: #007BFF; border-radius: 4px; cursor: pointer; }
+.paginas button:disabled { background: #007BFF; color: #fff; cursor: default; }
+@media print {
+    .product .thumb { -webkit-print-color-adjust: exact; print-color-adjust: exact; }
+}
+@media (min-width: 768px) {
+    .product { flex-direction: row; gap: 1rem; max-width: 600px; }
+    .product img, .product .thumb { width: 120px; max-width: 120px; }
+    .product-details { flex: 1; }
+}
+"""
+
+SCRIPT = """
+(function () {
+  var paginas = document.querySelectorAll(".pagina");
+  var botones = document.querySelectorAll(".paginas button");
+  function ver(i) {
+    paginas.forEach(function (p, j) { p.hidden = j !== i; });
+    botones.forEach(function (b, j) { b.disabled = j === i; });
+    window.scrollTo(0, 0);
+  }
+  botones.forEach(function (b, j) { b.onclick = function () { ver(j); }; });
+})();
+"""
+
+_PAGINA = Template("""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Reporte $consulta</title>
+<style>$estilo$clases_imagen</style>
+<noscript><style>.pagina[hidden] { display: block; } .paginas { display: none; }</style></noscript>
+</head>
+<body>
+<h1>Resultados para: $consulta</h1>
+<p class="paginas">$navegacion</p>
+$secciones
+<script>$script</script>
+</body>
+</html>
+""")
+
+_TARJETA = (
+    '<div class="product">{imagen}<div class="product-details">'
+    '<h2>{titulo}</h2>'
+    '<p class="store">Tienda: {tienda}</p>'
+    '<p class="date">Fecha: {fecha}</p>'
+    '<p class="price">Precio: ${precio:.2f} {moneda}</p>'
+    '<a href="{url}" target="_blank" rel="noopener">Ver producto</a>'
+    '</div></div>'
+)
+
+
+def _enlace(url):
+    # Solo http(s): el HTML viene de páginas de terceros
+    return escape(url) if url and url.startswith(("http://", "https://")) else "#"
+
+
+def _documento(lote, consulta, imagen_de, reglas=()):
+    # imagen_de(url, alt) puede agregar reglas CSS mientras se arman las tarjetas;
+    # la plantilla se sustituye una sola vez, ya con todas
+    secciones = []
+    for inicio in range(0, len(lote), PRODUCTOS_POR_PAGINA):
+        tarjetas = "".join(
+            _TARJETA.format(
+                imagen=imagen_de(producto.url_imagen, escape(producto.titulo or "")),
+                titulo=escape(producto.titulo or ""),
+                tienda=escape(producto.tienda),
+                fecha=escape(str(producto.fecha or "")),
+                precio=producto.precio,
+                moneda=producto.moneda,
+                url=_enlace(producto.url_producto),
+            )
+            for producto in lote[inicio:inicio + PRODUCTOS_POR_PAGINA]
+        )
+        oculta = " hidden" if inicio else ""
+        secciones.append(f'<section class="pagina"{oculta}>{tarjetas}</section>')
+
+    navegacion = ""
+    if len(secciones) > 1:
+        navegacion = "".join(
+            f'<button type="button"{" disabled" if i == 0 else ""}>{i + 1}</button>' for i in range(len(secciones))
+        )
+    return _PAGINA.substitute(
+        consulta=escape(consulta or ""),
+        estilo=ESTILO,
+        clases_imagen="".join(reglas),
+        navegacion=navegacion,
+        secciones="\n".join(secciones),
+        script=SCRIPT if navegacion else "",
+    )
+
+
+def generar_html(data, query, imagenes=None):
+    lote = como_lote(data)
+    imagenes = imagenes or cache_imagenes_compartida()
+    rutas = imagenes.precargar(lote.urls_imagen)
+    clases = {}
+    reglas = []
+
+    def imagen_de(url, alt):
+        ruta = rutas.get(url)
+        if not ruta:
+            return ""
+        clase = clases.get(ruta)
+        if clase is None:
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            clase = clases[ruta] = f"i{len(clases)}"
+            datos = base64.b64encode(contenido).decode()
+            reglas.append(f".{clase} {{ background-image: url(data:{tipo_imagen(contenido)[0]};base64,{datos}); }}\n")
+        return f'<div class="thumb {clase}" role="img" aria-label="{alt}"></div>'
+
+    return _documento(lote, query, imagen_de, reglas)
+
+
+def generar_paquete(data, query, imagenes=None):
+    # Zip con index.html y cada miniatura distinta una sola vez (el nombre ya es su hash)
+    lote = como_lote(data)
+    imagenes = imagenes or cache_imagenes_compartida()
+    rutas = imagenes.precargar(lote.urls_imagen)
+    archivos = {}
+
+    def imagen_de(url, alt):
+        ruta = rutas.get(url)
+        if not ruta:
+            return ""
+        nombre = archivos.setdefault(ruta, f"imagenes/{os.path.basename(ruta)}")
+        return f'<img src="{escape(nombre)}" loading="lazy" alt="{alt}">'
+
+    documento = _documento(lote, query, imagen_de)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as paquete:
+        paquete.writestr("index.html", documento, compress_type=zipfile.ZIP_DEFLATED)
+        for ruta, nombre in archivos.items():
+            # Las miniaturas ya están comprimidas; se guardan tal cual
+            paquete.write(ruta, nombre, compress_type=zipfile.ZIP_STORED)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,110 @@
+# PDF dibujado página por página con el canvas de reportlab: no se arma la lista
+# completa de flowables, las miniaturas se piden por bloques ya reducidas a disco
+# y la salida va a un archivo temporal que solo pasa a disco si crece.
+import tempfile
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from cache_imagenes import cache_imagenes_compartida
+from producto import como_lote
+
+MARGEN = 50
+LADO_IMAGEN = 100
+ALTO_PRODUCTO = 130
+PRODUCTOS_POR_BLOQUE = 40
+MAX_BYTES_EN_MEMORIA = 8 * 1024 * 1024
+FUENTE = "Helvetica"
+FUENTE_NEGRITA = "Helvetica-Bold"
+
+
+def _lineas(texto, fuente, tamano, ancho, maximo):
+    lineas = simpleSplit(str(texto), fuente, tamano, ancho)
+    if len(lineas) > maximo:
+        lineas = lineas[:maximo]
+        lineas[-1] = lineas[-1][:-1] + "…"
+    return lineas
+
+
+class ReportePDF:
+    def __init__(self, destino, query, tamano_pagina=letter):
+        self.ancho, self.alto = tamano_pagina
+        self.query = query
+        self._canvas = canvas.Canvas(destino, pagesize=tamano_pagina, pageCompression=1)
+        self._canvas.setTitle(f"Resultados de búsqueda: {query}")
+        self._y = None
+        self.paginas = 0
+
+    def _nueva_pagina(self):
+        if self._y is not None:
+            self._canvas.showPage()
+        self.paginas += 1
+        self._y = self.alto - MARGEN
+        if self.paginas == 1:
+            self._canvas.setFont(FUENTE_NEGRITA, 18)
+            for linea in _lineas(f"Resultados de búsqueda: {self.query}", FUENTE_NEGRITA, 18, self.ancho - 2 * MARGEN, 2):
+                self._y -= 22
+                self._canvas.drawCentredString(self.ancho / 2, self._y, linea)
+            self._y -= 20
+        self._canvas.setFont(FUENTE, 8)
+        self._canvas.drawRightString(self.ancho - MARGEN, MARGEN / 2, f"Página {self.paginas}")
+
+    def agregar(self, producto, ruta_imagen=None):
+        if self._y is None or self._y - ALTO_PRODUCTO < MARGEN:
+            self._nueva_pagina()
+        c = self._canvas
+        arriba = self._y
+        texto_x = MARGEN + LADO_IMAGEN + 15
+        ancho_texto = self.ancho - MARGEN - texto_x
+
+        if ruta_imagen:
+            try:
+                c.drawImage(ruta_imagen, MARGEN, arriba - LADO_IMAGEN, LADO_IMAGEN, LADO_IMAGEN,
+                            preserveAspectRatio=True, anchor="c")
+            except Exception as e:
+                c.setFont(FUENTE, 7)
+                c.drawString(MARGEN, arriba - 10, f"[No se pudo cargar la imagen: {e}]"[:40])
+
+        y = arriba
+        c.setFont(FUENTE_NEGRITA, 11)
+        for linea in _lineas(producto.titulo, FUENTE_NEGRITA, 11, ancho_texto, 3):
+            y -= 13
+            c.drawString(texto_x, y, linea)
+        c.setFont(FUENTE, 10)
+        for linea in (f"Precio: ${producto.precio:.2f} {producto.moneda}",
+                      f"Tienda: {producto.tienda}",
+                      f"Fecha: {producto.fecha}"):
+            y -= 13
+            c.drawString(texto_x, y, linea)
+        c.setFont(FUENTE, 8)
+        for linea in _lineas(producto.url_producto, FUENTE, 8, ancho_texto, 2):
+            y -= 10
+            c.drawString(texto_x, y, linea)
+        c.linkURL(producto.url_producto, (texto_x, y - 2, self.ancho - MARGEN, arriba), relative=0)
+
+        self._y = arriba - ALTO_PRODUCTO
+
+    def cerrar(self):
+        if self._y is None:
+            self._nueva_pagina()
+        self._canvas.save()
+
+
+def generar_pdf(data, query, progreso=None, imagenes=None):
+    # progreso(hechos, total) se llama al terminar cada bloque de productos
+    lote = como_lote(data)
+    imagenes = imagenes or cache_imagenes_compartida()
+    salida = tempfile.SpooledTemporaryFile(max_size=MAX_BYTES_EN_MEMORIA)
+    reporte = ReportePDF(salida, query)
+    total = len(lote)
+    for inicio in range(0, total, PRODUCTOS_POR_BLOQUE):
+        bloque = lote[inicio:inicio + PRODUCTOS_POR_BLOQUE]
+        rutas = imagenes.precargar(bloque.urls_imagen)
+        for producto in bloque:
+            reporte.agregar(producto, rutas.get(producto.url_imagen))
+        if progreso:
+            progreso(min(inicio + PRODUCTOS_POR_BLOQUE, total), total)
+    reporte.cerrar()
+    salida.seek(0)
+    return salida
@@ -0,0 +1,13 @@
+# Carpeta de estado local (cachés, historial, consultas del vigilante, tasas).
+# Se ancla a la carpeta del proyecto y no al directorio de trabajo: el vigilante
+# lanzado desde cron (que suele correr en $HOME) y la página deben leer y escribir
+# los mismos archivos. DEALMINER_DATOS la cambia de lugar.
+import os
+
+DIRECTORIO_DATOS = os.environ.get("DEALMINER_DATOS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".dealminer"
+)
+
+
+def ruta_datos(*partes):
+    return os.path.join(DIRECTORIO_DATOS, *partes)
@@ -0,0 +1,133 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cache_http import cache_http_compartida
+from concurrencia import MAX_TRABAJADORES
+from trafico import MAX_BYTES_VERIFICACION, control_compartido, host_de
+from metricas import contar, cronometro
+
+TIMEOUT_CONEXION = 5
+TIMEOUT_LECTURA = 20
+REINTENTOS = 3
+FACTOR_ESPERA = 0.5
+# 429/503 no se reintentan aquí: son un freno de la tienda y los atiende
+# ControlTrafico (pausa con Retry-After acotado, menos concurrencia)
+ESTADOS_REINTENTO = (500, 502, 504)
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+
+# urllib3 solo descomprime brotli si alguno de estos paquetes está instalado
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+class Bloqueado(requests.exceptions.HTTPError):
+    # La tienda respondió con un freno (429/503) o una página de verificación
+    pass
+
+
+CABECERAS_CONDICIONALES = ("If-None-Match", "If-Modified-Since")
+
+
+def _reutilizar(respuesta, cuerpo, tipo, codificacion):
+    # Convierte un 304 en la respuesta completa guardada
+    respuesta.status_code = 200
+    respuesta._content = cuerpo
+    if tipo:
+        respuesta.headers["Content-Type"] = tipo
+    respuesta.encoding = codificacion
+
+
+class SesionDealMiner(requests.Session):
+    # requests no permite un timeout por defecto en la sesión; se aplica aquí,
+    # junto con el ritmo por host, la detección de bloqueos de ControlTrafico y,
+    # para las peticiones con revalidar=True, la caché de ETag / Last-Modified
+    def __init__(self, timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA), reintentos=REINTENTOS,
+                 factor_espera=FACTOR_ESPERA, tam_pool=MAX_TRABAJADORES, control=None, cache_http=None):
+        super().__init__()
+        self.timeout = timeout
+        self.control = control or control_compartido()
+        self.cache_http = cache_http or cache_http_compartida()
+        retry = Retry(
+            total=reintentos,
+            backoff_factor=factor_espera,
+            status_forcelist=ESTADOS_REINTENTO,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(pool_connections=tam_pool, pool_maxsize=tam_pool, max_retries=retry)
+        self.mount("https://", adaptador)
+        self.mount("http://", adaptador)
+        self.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+
+    def request(self, method, url, revalidar=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = host_de(url)
+        condicional = revalidar and method.upper() == "GET" and not kwargs.get("stream")
+        if condicional:
+            condiciones = self.cache_http.condiciones(url)
+            if condiciones:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **condiciones}
+        with cronometro("espera_turno", host=host):
+            self.control.esperar_turno(url)
+        with cronometro("http", host=host):
+            respuesta = super().request(method, url, **kwargs)
+        contar("respuestas_http", host=host, estado=respuesta.status_code)
+        if not kwargs.get("stream"):
+            contar("bytes_descargados", len(respuesta.content), host=host)
+        # Solo se inspecciona el cuerpo de las páginas HTML cortas ya descargadas
+        texto = None
+        if not kwargs.get("stream") and "html" in respuesta.headers.get("Content-Type", "") \
+                and len(respuesta.content) <= MAX_BYTES_VERIFICACION:
+            texto = respuesta.text
+        motivo = self.control.registrar(
+            url, respuesta.status_code, respuesta.headers.get("Retry-After"), texto, respuesta.url
+        )
+        if motivo:
+            raise Bloqueado(f"{motivo}: {url}", response=respuesta)
+        if condicional:
+            return self._revalidar(method, url, respuesta, host, kwargs)
+        return respuesta
+
+    def _revalidar(self, method, url, respuesta, host, kwargs):
+        if respuesta.status_code == 304:
+            guardado = self.cache_http.cuerpo(url)
+            if guardado is None:
+                # La entrada se podó mientras tanto: se pide completa
+                kwargs["headers"] = {
+                    k: v for k, v in kwargs["headers"].items() if k not in CABECERAS_CONDICIONALES
+                }
+                return self.request(method, url, revalidar=True, **kwargs)
+            _reutilizar(respuesta, *guardado)
+            contar("revalidaciones", host=host, resultado="no_modificado")
+            contar("bytes_ahorrados", len(respuesta.content), host=host)
+        elif respuesta.status_code == 200:
+            if any(k in (kwargs.get("headers") or {}) for k in CABECERAS_CONDICIONALES):
+                contar("revalidaciones", host=host, resultado="modificado")
+            self.cache_http.guardar(url, respuesta)
+        return respuesta
+
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def obtener_sesion():
+    # Sesión única por proceso para reutilizar conexiones entre reruns de Streamlit
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            _sesion = SesionDealMiner()
+        return _sesion
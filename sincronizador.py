@@ -0,0 +1,245 @@
+# Búsqueda en las tiendas registradas: paginación en paralelo, detalle con caché y
+# plazo por tienda. No depende de Streamlit, así que lo usan igual la página, el
+# vigilante y la línea de comandos (buscar.py).
+import queue
+import threading
+import time
+
+from cache_productos import cache_compartida, clave_producto
+from concurrencia import futuro_resuelto, motor_compartido
+from metricas import contar, cronometro
+from producto import Lote, Producto, fecha_lote
+from sesion_http import obtener_sesion
+from tiendas import CAMPOS, crear_tienda, nombres_tiendas, oferta
+
+# Techo absoluto de páginas por tienda y búsqueda; dentro de él, cada búsqueda pide
+# a lo más el doble (más una) de las páginas que su límite necesita, para cubrir
+# duplicados y páginas cortas sin recorrer el listado entero
+MAX_PAGINAS = 50
+
+
+class Sincronizador:
+    def __init__(self, motor=None, sesion=None, cache=None, tiendas=None, urls=None, precios_frescos=False):
+        # tiendas: nombres registrados que se habilitan (todas por defecto);
+        # urls: {nombre: url_base} para apuntar una tienda a otro servidor;
+        # precios_frescos: no tomar de la caché de productos un precio que el listado
+        # no trae (el vigilante y los refrescos registran observaciones nuevas, no
+        # las de hace horas); la página de detalle se revalida con ETag
+        urls = urls or {}
+        self.tiendas = {
+            nombre: crear_tienda(nombre, urls.get(nombre))
+            for nombre in (tiendas or nombres_tiendas())
+        }
+        self.motor = motor or motor_compartido()
+        self.sesion = sesion or obtener_sesion()
+        self.cache = cache or cache_compartida()
+        self.precios_frescos = precios_frescos
+
+    def en_cache(self, url):
+        guardado = self.cache.obtener(url)
+        if guardado is None:
+            return None
+        titulo, imagen, precio = guardado
+        return oferta(url, titulo, precio, imagen)
+
+    def detalle(self, url, tienda, usar_cache=True):
+        guardado = self.en_cache(url) if usar_cache else None
+        if guardado is not None:
+            return guardado
+
+        with cronometro("descarga", tienda=tienda.nombre, pagina="detalle"):
+            respuesta = self.sesion.get(url, headers=tienda.cabeceras, revalidar=True)
+        with cronometro("parseo", tienda=tienda.nombre, pagina="detalle"):
+            detalle = tienda.parsear_detalle(respuesta.text)
+
+        if tienda.detalle_valido(detalle):
+            self.cache.guardar(url, detalle["titulo"], detalle["imagen"], detalle["precio"])
+        else:
+            contar("parseo_fallos", tienda=tienda.nombre, pagina="detalle")
+        return detalle
+
+    def listado(self, url, tienda):
+        with cronometro("descarga", tienda=tienda.nombre, pagina="listado"):
+            respuesta = self.sesion.get(url, headers=tienda.cabeceras)
+        with cronometro("parseo", tienda=tienda.nombre, pagina="listado"):
+            items = tienda.parsear_listado(respuesta.text)
+        validos = [item for item in items if item["enlace"]]
+        if not items or len(validos) < len(items):
+            contar("parseo_fallos", (len(items) - len(validos)) or 1, tienda=tienda.nombre, pagina="listado")
+        return validos
+
+    def paginar(self, obtener_pagina, url_pagina, por_pagina, limite, clave=clave_producto, faltan=None):
+        # Pide en paralelo las páginas necesarias para los resultados que faltan y
+        # entrega los elementos nuevos en el orden del listado: una página que llega
+        # antes que la anterior espera su turno. Si faltan resultados (duplicados,
+        # páginas cortas o fallidas, o elementos que el consumidor descartó) pide otro
+        # lote, sin pasar del tope de páginas. faltan() dice cuántos elementos quiere
+        # aún el consumidor; por defecto, `limite` menos los entregados.
+        vistos = set()
+        entregados = 0
+        siguiente = 1
+        respondidas = 0
+        error = None
+        if faltan is None:
+            def faltan():
+                return limite - entregados
+        tope = min(MAX_PAGINAS, 2 * -(-limite // por_pagina) + 1)
+        while siguiente <= tope and faltan() > 0:
+            ultima = min(siguiente + -(-faltan() // por_pagina), tope + 1)
+            futuros = [
+                self.motor.enviar(self._pagina_segura, url_pagina(numero), obtener_pagina)
+                for numero in range(siguiente, ultima)
+            ]
+            siguiente = ultima
+            nuevos = 0
+            respondidas_antes = respondidas
+            for futuro in futuros:
+                elementos, fallo = futuro.result()
+                if fallo is not None:
+                    error = fallo
+                    continue
+                respondidas += 1
+                for elemento in elementos:
+                    identificador = clave(elemento)
+                    if identificador in vistos:
+                        continue
+                    if faltan() <= 0:
+                        return
+                    vistos.add(identificador)
+                    entregados += 1
+                    nuevos += 1
+                    yield elemento
+            # Un lote que respondió sin aportar nada marca el fin del listado; uno
+            # que falló entero no, y se sigue con las páginas siguientes
+            if not nuevos and respondidas > respondidas_antes:
+                break
+        # Páginas sueltas pueden fallar; si no respondió ninguna, la tienda falló
+        if not respondidas and error is not None:
+            raise error
+
+    @staticmethod
+    def _pagina_segura(url, obtener_pagina):
+        try:
+            return obtener_pagina(url), None
+        except Exception as e:
+            return [], e
+
+    def iterar_tienda(self, tienda, producto: str, limite=10, enriquecer=False):
+        # Las páginas de detalle se encolan apenas llega cada elemento del listado
+        # y cada producto se entrega en cuanto su detalle termina. Un elemento ocupa
+        # su lugar mientras se pide su detalle; si el detalle falla, el lugar se
+        # libera y el listado entrega el siguiente en su reemplazo.
+        if isinstance(tienda, str):
+            tienda = self.tiendas[tienda]
+        fecha = fecha_lote()
+        listos = queue.Queue()
+        en_vuelo = 0
+        producidos = 0
+        items = self.paginar(
+            lambda url: self.listado(url, tienda),
+            lambda pagina: tienda.url_busqueda(producto, pagina),
+            tienda.por_pagina,
+            limite,
+            clave=lambda item: clave_producto(item["enlace"]),
+            faltan=lambda: limite - producidos - en_vuelo,
+        )
+
+        def pedir_detalle(item):
+            if not tienda.necesita_detalle(item, enriquecer):
+                return futuro_resuelto(None)
+            # La caché se consulta aquí y no en el motor: un acierto no debe gastar
+            # la ficha de ritmo del host ni esperar su turno como una descarga
+            usar_cache = not self.precios_frescos or item["precio"] is not None
+            guardado = self.en_cache(item["enlace"]) if usar_cache else None
+            if guardado is not None:
+                return futuro_resuelto(guardado)
+            return self.motor.enviar(self.detalle, item["enlace"], tienda, False)
+
+        agotado = False
+        while producidos < limite:
+            if listos.empty() and not agotado and producidos + en_vuelo < limite:
+                item = next(items, None)
+                if item is None:
+                    agotado = True
+                else:
+                    en_vuelo += 1
+                    pedir_detalle(item).add_done_callback(lambda futuro, item=item: listos.put((item, futuro)))
+                continue
+            if not en_vuelo:
+                break
+            item, futuro = listos.get()
+            en_vuelo -= 1
+            try:
+                detalle = futuro.result()
+            except Exception:
+                detalle = None
+            if detalle:
+                # Lo que trae el detalle manda; el listado cubre lo que falte
+                item = {campo: item[campo] if detalle[campo] is None else detalle[campo] for campo in CAMPOS}
+            if not item["titulo"] or item["precio"] is None:
+                contar("parseo_fallos", tienda=tienda.nombre, pagina="producto")
+                continue
+            producidos += 1
+            yield Producto(item["titulo"], item["precio"], item["enlace"], tienda.nombre, item["imagen"], fecha)
+
+    def buscar_en(self, tienda, producto: str, limite=10, enriquecer=False):
+        return Lote(self.iterar_tienda(tienda, producto, limite, enriquecer))
+
+    def iterar(self, producto: str, tiendas, limite=10, plazos=None, vencidas=None, fallidas=None):
+        # Cada tienda corre en su propio hilo y deja sus productos en una cola común;
+        # se entregan conforme llegan, sin esperar a la tienda más lenta. Una tienda
+        # que pasa su plazo deja de esperarse (y se anota en `vencidas`, si se da);
+        # una que termina con error se anota en `fallidas`.
+        plazos = plazos or {}
+        seleccion = [self.tiendas[nombre] for nombre in tiendas if nombre in self.tiendas]
+        cola = queue.Queue()
+        fin = object()
+        fallo = object()
+        cancelar = {tienda.nombre: threading.Event() for tienda in seleccion}
+
+        def correr(tienda):
+            final = fin
+            try:
+                for item in self.iterar_tienda(tienda, producto, limite):
+                    if cancelar[tienda.nombre].is_set():
+                        break
+                    cola.put((tienda.nombre, item))
+            except Exception:
+                contar("tiendas_fallidas", tienda=tienda.nombre)
+                final = fallo
+            finally:
+                cola.put((tienda.nombre, final))
+
+        inicio = time.monotonic()
+        limites = {}
+        for tienda in seleccion:
+            limites[tienda.nombre] = inicio + plazos.get(tienda.nombre, tienda.plazo)
+            threading.Thread(target=correr, args=(tienda,), daemon=True).start()
+
+        try:
+            while limites:
+                try:
+                    nombre, item = cola.get(timeout=max(0.0, min(limites.values()) - time.monotonic()))
+                except queue.Empty:
+                    ahora = time.monotonic()
+                    for nombre in [nombre for nombre, limite_tienda in limites.items() if limite_tienda <= ahora]:
+                        del limites[nombre]
+                        cancelar[nombre].set()
+                        contar("tiendas_vencidas", tienda=nombre)
+                        if vencidas is not None:
+                            vencidas.append(nombre)
+                    continue
+                if nombre not in limites:
+                    continue
+                if item is fin or item is fallo:
+                    del limites[nombre]
+                    if item is fallo and fallidas is not None:
+                        fallidas.append(nombre)
+                else:
+                    yield item
+        finally:
+            for evento in cancelar.values():
+                evento.set()
+
+    def buscar(self, producto: str, tiendas, limite=10, plazos=None, vencidas=None, fallidas=None):
+        return Lote(self.iterar(producto, tiendas, limite, plazos, vencidas, fallidas))
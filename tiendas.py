@@ -0,0 +1,138 @@
+# Adaptadores de tienda: cada uno sabe armar la URL de búsqueda, leer el listado y
+# la página de detalle y en qué moneda publica. El Sincronizador solo orquesta
+# (paginación, descargas en paralelo, caché, plazos) y no conoce tiendas concretas.
+#
+# Listado y detalle devuelven dicts con las mismas claves (CAMPOS); lo que el
+# listado no trae queda en None y lo completa el detalle si hace falta.
+from abc import ABC, abstractmethod
+
+import parseo
+from precios import precio_partido
+
+CAMPOS = ("enlace", "titulo", "precio", "imagen")
+NAVEGADOR = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+_tiendas = {}
+
+
+def registrar_tienda(clase):
+    # Un adaptador incompleto falla al registrarse, no a mitad de un recorrido
+    if clase.__abstractmethods__:
+        faltan = ", ".join(sorted(clase.__abstractmethods__))
+        raise TypeError(f"la tienda {clase.__name__} no implementa: {faltan}")
+    _tiendas[clase.nombre] = clase
+    return clase
+
+
+def nombres_tiendas():
+    return list(_tiendas)
+
+
+def clase_tienda(nombre):
+    return _tiendas[nombre]
+
+
+def crear_tienda(nombre, url_base=None):
+    return _tiendas[nombre](url_base)
+
+
+def moneda_de(nombre):
+    clase = _tiendas.get(nombre)
+    return clase.moneda if clase else ""
+
+
+def oferta(enlace=None, titulo=None, precio=None, imagen=None):
+    return {"enlace": enlace, "titulo": titulo or None, "precio": precio, "imagen": imagen}
+
+
+class Tienda(ABC):
+    nombre = None
+    moneda = None
+    url_base = None
+    por_pagina = 20
+    # Segundos que puede tardar una búsqueda completa antes de dejar de esperarla
+    plazo = 45
+    # Búsquedas completas por hora que se permiten al vigilante
+    presupuesto_por_hora = 20
+    cabeceras = {"User-Agent": NAVEGADOR}
+
+    def __init__(self, url_base=None):
+        if url_base:
+            self.url_base = url_base
+
+    @abstractmethod
+    def url_busqueda(self, consulta, pagina=1):
+        pass
+
+    @abstractmethod
+    def parsear_listado(self, html):
+        pass
+
+    @abstractmethod
+    def parsear_detalle(self, html):
+        pass
+
+    def necesita_detalle(self, item, enriquecer=False):
+        return enriquecer or not item["titulo"] or item["precio"] is None
+
+    def detalle_valido(self, detalle):
+        # Solo los detalles válidos se guardan en la caché de productos
+        return bool(detalle["titulo"])
+
+    def __repr__(self):
+        return f"<Tienda {self.nombre} {self.url_base}>"
+
+
+@registrar_tienda
+class Amazon(Tienda):
+    nombre = "Amazon"
+    moneda = "USD"
+    url_base = "https://www.amazon.com"
+    por_pagina = 16
+    plazo = 60
+    presupuesto_por_hora = 20
+    cabeceras = {"User-Agent": NAVEGADOR, "Accept-Language": "en-US,en;q=0.9"}
+
+    def url_busqueda(self, consulta, pagina=1):
+        url = f"{self.url_base}/s?k={consulta.replace(' ', '+')}"
+        return url if pagina == 1 else f"{url}&page={pagina}"
+
+    def parsear_listado(self, html):
+        # La búsqueda solo da enlaces; título, imagen y precio salen del detalle
+        return [oferta(self.url_base + href) for href in parseo.enlaces_amazon(html)]
+
+    def parsear_detalle(self, html):
+        titulo, imagen, precio = parseo.producto_amazon(html)
+        return oferta(titulo=None if titulo == 'No title found' else titulo, precio=precio, imagen=imagen)
+
+    def detalle_valido(self, detalle):
+        return bool(detalle["titulo"]) and detalle["precio"] is not None
+
+
+@registrar_tienda
+class MercadoLibre(Tienda):
+    nombre = "Mercado Libre"
+    moneda = "MXN"
+    url_base = "https://listado.mercadolibre.com.mx"
+    por_pagina = 48
+    plazo = 30
+    presupuesto_por_hora = 40
+
+    def url_busqueda(self, consulta, pagina=1):
+        url = f"{self.url_base}/{consulta.replace(' ', '+')}"
+        if pagina == 1:
+            return url
+        return f"{url}_Desde_{(pagina - 1) * self.por_pagina + 1}_NoIndex_True"
+
+    def parsear_listado(self, html):
+        return [
+            oferta(item["enlace"], item["titulo"], precio_partido(item["precio_entero"], item["precio_decimal"]), item["imagen"])
+            for item in parseo.items_mercado_libre(html)
+        ]
+
+    def parsear_detalle(self, html):
+        return oferta(titulo=parseo.titulo_mercado_libre(html))
+
+    def necesita_detalle(self, item, enriquecer=False):
+        # El listado ya trae el precio; el detalle solo aporta el título
+        return enriquecer or not item["titulo"]
@@ -0,0 +1,247 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+MAX_POR_HOST = 6
+MIN_POR_HOST = 1
+# Peticiones por segundo y ráfaga por dominio de tienda (incluye subdominios).
+# Los hosts que no aparecen aquí (CDN de imágenes, servidor local) no se pausan.
+TASAS_HOST = {
+    "amazon.com": (3, 6),
+    "mercadolibre.com.mx": (8, 16),
+}
+ESTADOS_FRENO = (429, 503)
+# Tras un freno no se vuelve a reducir la concurrencia hasta que pase este tiempo,
+# para que una ráfaga de errores simultáneos cuente como una sola señal
+ENFRIAMIENTO_SEGUNDOS = 2.0
+MAXIMA_PAUSA_SEGUNDOS = 120
+# Las páginas de verificación pesan unos KB; las de producto y listado cientos,
+# así que solo se revisa el cuerpo de las respuestas cortas
+MAX_BYTES_VERIFICACION = 64 * 1024
+
+_MARCAS_BLOQUEO = re.compile(
+    r"/errors/validateCaptcha|<title[^>]*>\s*Robot Check|api-services-support@amazon\.com"
+    r"|account-verification|g-recaptcha|h-captcha|cf-challenge",
+    re.IGNORECASE,
+)
+
+
+def host_de(url):
+    return (urlsplit(url).hostname or url).lower()
+
+
+def motivo_bloqueo(estado, url_final="", texto=None):
+    # 429/503 o una página de verificación servida con 200 en lugar del contenido
+    if estado in ESTADOS_FRENO:
+        return f"HTTP {estado}"
+    if _MARCAS_BLOQUEO.search(url_final or ""):
+        return "redirección a verificación"
+    if texto and len(texto) <= MAX_BYTES_VERIFICACION and _MARCAS_BLOQUEO.search(texto):
+        return "página de captcha"
+    return None
+
+
+def segundos_retry_after(valor):
+    if not valor:
+        return None
+    try:
+        segundos = float(valor)
+    except ValueError:
+        try:
+            segundos = parsedate_to_datetime(valor).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(segundos, 0.0), MAXIMA_PAUSA_SEGUNDOS)
+
+
+class CubetaFichas:
+    # "tasa" fichas por segundo hasta un máximo de "rafaga"; quien pide una ficha
+    # sin saldo la toma prestada y espera lo que tarde en reponerse
+    def __init__(self, tasa, rafaga=1):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self._fichas = float(rafaga)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reponer(self):
+        # Suma las fichas ganadas desde la última vez; se llama con el candado tomado
+        ahora = time.monotonic()
+        self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def reservar(self):
+        with self._lock:
+            self._reponer()
+            self._fichas -= 1
+            return 0.0 if self._fichas >= 0 else -self._fichas / self.tasa
+
+    def esperar(self):
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+
+class ConcurrenciaAdaptativa:
+    # Cupos por host cuyo tope sigue AIMD: sube 1 por cada "limite" respuestas
+    # sanas y se reduce a la mitad ante un freno (429/503/captcha). No bloquea:
+    # quien no consigue cupo deja la tarea en espera (ver MotorDescargas).
+    def __init__(self, maximo=MAX_POR_HOST, minimo=MIN_POR_HOST, enfriamiento=ENFRIAMIENTO_SEGUNDOS):
+        self.maximo = maximo
+        self.minimo = minimo
+        self.enfriamiento = enfriamiento
+        self.limite = float(maximo)
+        self.en_curso = 0
+        self._ultimo_freno = 0.0
+        self._lock = threading.Lock()
+
+    def intentar(self):
+        with self._lock:
+            if self.en_curso >= int(self.limite):
+                return False
+            self.en_curso += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self.en_curso -= 1
+
+    def exito(self):
+        with self._lock:
+            self.limite = min(self.maximo, self.limite + 1 / self.limite)
+
+    def freno(self):
+        with self._lock:
+            ahora = time.monotonic()
+            if ahora - self._ultimo_freno < self.enfriamiento:
+                return
+            self._ultimo_freno = ahora
+            self.limite = max(self.minimo, self.limite / 2)
+
+
+class EstadoHost:
+    def __init__(self, concurrencia, cubeta):
+        self.concurrencia = concurrencia
+        self.cubeta = cubeta
+        self.pausa_hasta = 0.0
+        self.peticiones = 0
+        self.frenos = 0
+        self.bloqueos = 0
+
+
+class ControlTrafico:
+    # Estado compartido por host entre el motor de descargas (cuántas a la vez)
+    # y la sesión HTTP (a qué ritmo, y qué respuestas cuentan como freno)
+    def __init__(self, max_por_host=MAX_POR_HOST, limites_host=None, tasas_host=TASAS_HOST):
+        self.max_por_host = max_por_host
+        self.limites_host = dict(limites_host or {})
+        self.tasas_host = dict(tasas_host or {})
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._turno = threading.local()
+
+    def _tasa(self, host):
+        for dominio, tasa in self.tasas_host.items():
+            if host == dominio or host.endswith("." + dominio):
+                return tasa
+        return None
+
+    def host(self, url):
+        host = host_de(url)
+        with self._lock:
+            estado = self._hosts.get(host)
+            if estado is None:
+                tasa = self._tasa(host)
+                estado = EstadoHost(
+                    ConcurrenciaAdaptativa(self.limites_host.get(host, self.max_por_host)),
+                    CubetaFichas(*tasa) if tasa else None,
+                )
+                self._hosts[host] = estado
+        return estado
+
+    def concurrencia(self, url):
+        return self.host(url).concurrencia
+
+    def reservar_turno(self, url):
+        # Para el motor: toma la ficha del host antes de pasar la tarea al pool y
+        # devuelve cuántos segundos debe esperar (pausa por freno o ritmo) sin ocupar un hilo
+        estado = self.host(url)
+        espera = max(0.0, estado.pausa_hasta - time.monotonic())
+        if estado.cubeta is not None:
+            espera = max(espera, estado.cubeta.reservar())
+        return espera
+
+    @contextmanager
+    def con_turno(self, url):
+        # La primera petición de una tarea del motor ya tiene su ficha reservada
+        self._turno.host = host_de(url)
+        try:
+            yield
+        finally:
+            self._turno.host = None
+
+    def esperar_turno(self, url):
+        estado = self.host(url)
+        if getattr(self._turno, "host", None) == host_de(url):
+            self._turno.host = None
+        else:
+            pausa = estado.pausa_hasta - time.monotonic()
+            if pausa > 0:
+                time.sleep(pausa)
+            if estado.cubeta is not None:
+                estado.cubeta.esperar()
+        with self._lock:
+            estado.peticiones += 1
+
+    def frenar(self, url, retry_after=None):
+        estado = self.host(url)
+        estado.concurrencia.freno()
+        segundos = segundos_retry_after(retry_after)
+        with self._lock:
+            estado.frenos += 1
+            if segundos:
+                estado.pausa_hasta = max(estado.pausa_hasta, time.monotonic() + segundos)
+
+    def registrar(self, url, estado_http, retry_after=None, texto=None, url_final=""):
+        motivo = motivo_bloqueo(estado_http, url_final, texto)
+        if motivo is None:
+            self.host(url).concurrencia.exito()
+            return None
+        self.frenar(url, retry_after)
+        estado = self.host(url)
+        with self._lock:
+            estado.bloqueos += 1
+        return motivo
+
+    @property
+    def bloqueos(self):
+        with self._lock:
+            return sum(estado.bloqueos for estado in self._hosts.values())
+
+    def resumen(self):
+        with self._lock:
+            return {
+                host: {
+                    "limite": int(estado.concurrencia.limite),
+                    "en_curso": estado.concurrencia.en_curso,
+                    "peticiones": estado.peticiones,
+                    "frenos": estado.frenos,
+                    "bloqueos": estado.bloqueos,
+                }
+                for host, estado in self._hosts.items()
+            }
+
+
+_control = None
+_control_lock = threading.Lock()
+
+
+def control_compartido():
+    global _control
+    with _control_lock:
+        if _control is None:
+            _control = ControlTrafico()
+        return _control
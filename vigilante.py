@@ -0,0 +1,329 @@
+# Vigilante de precios sin interfaz: vuelve a correr las consultas guardadas a
+# intervalos (con variación aleatoria) y escribe los resultados en el historial,
+# de modo que la página lee datos ya calculados en lugar de raspar al momento.
+#
+#   python vigilante.py agregar "audifonos bluetooth" --tiendas Amazon "Mercado Libre" --cada 60
+#   python vigilante.py listar
+#   python vigilante.py quitar 3
+#   python vigilante.py correr [--una-vez]
+import argparse
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+from cache_busquedas import normalizar_consulta
+from historial import historial_compartido
+from trafico import CubetaFichas
+from tiendas import clase_tienda, nombres_tiendas
+from metricas import contar, cronometro, metricas_compartidas
+from sincronizador import Sincronizador
+import archivo_columnar
+from rutas import ruta_datos
+
+RUTA_VIGILANTE = ruta_datos("vigilante.sqlite3")
+TIENDAS = nombres_tiendas()
+INTERVALO_SEGUNDOS = 60 * 60
+VARIACION = 0.15
+TRABAJADORES = 2
+REVISION_SEGUNDOS = 5
+# Búsquedas completas por hora que se permiten en cada tienda
+PRESUPUESTO_POR_HORA = {nombre: clase_tienda(nombre).presupuesto_por_hora for nombre in TIENDAS}
+
+
+def _con_variacion(segundos, variacion=VARIACION):
+    return segundos * random.uniform(1 - variacion, 1 + variacion)
+
+
+class ConsultasGuardadas:
+    def __init__(self, ruta=RUTA_VIGILANTE):
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS consultas (
+                id INTEGER PRIMARY KEY,
+                consulta TEXT NOT NULL,
+                tiendas TEXT NOT NULL,
+                limite INTEGER NOT NULL,
+                intervalo REAL NOT NULL,
+                proxima REAL NOT NULL,
+                ultima REAL,
+                error TEXT,
+                UNIQUE (consulta, tiendas, limite)
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_consultas_proxima ON consultas (proxima)")
+        self._conexion.commit()
+
+    def guardar(self, consulta, tiendas, limite=10, intervalo=INTERVALO_SEGUNDOS):
+        tiendas = json.dumps(sorted(set(tiendas)), ensure_ascii=False)
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT INTO consultas (consulta, tiendas, limite, intervalo, proxima) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (consulta, tiendas, limite) DO UPDATE SET intervalo = excluded.intervalo",
+                (normalizar_consulta(consulta), tiendas, int(limite), float(intervalo), time.time()),
+            )
+            return self._conexion.execute(
+                "SELECT id FROM consultas WHERE consulta = ? AND tiendas = ? AND limite = ?",
+                (normalizar_consulta(consulta), tiendas, int(limite)),
+            ).fetchone()[0]
+
+    def quitar(self, id_consulta):
+        with self._lock, self._conexion:
+            return self._conexion.execute("DELETE FROM consultas WHERE id = ?", (id_consulta,)).rowcount
+
+    def listar(self):
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT id, consulta, tiendas, limite, intervalo, proxima, ultima, error FROM consultas ORDER BY id"
+            ).fetchall()
+        return [self._consulta(fila) for fila in filas]
+
+    def pendientes(self, ahora=None):
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT id, consulta, tiendas, limite, intervalo, proxima, ultima, error FROM consultas "
+                "WHERE proxima <= ? ORDER BY proxima",
+                (ahora or time.time(),),
+            ).fetchall()
+        return [self._consulta(fila) for fila in filas]
+
+    def reprogramar(self, id_consulta, proxima):
+        with self._lock, self._conexion:
+            self._conexion.execute("UPDATE consultas SET proxima = ? WHERE id = ?", (proxima, id_consulta))
+
+    def marcar(self, id_consulta, error=None):
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "UPDATE consultas SET ultima = ?, error = ? WHERE id = ?", (time.time(), error, id_consulta)
+            )
+
+    @staticmethod
+    def _consulta(fila):
+        return {
+            "id": fila[0],
+            "consulta": fila[1],
+            "tiendas": json.loads(fila[2]),
+            "limite": fila[3],
+            "intervalo": fila[4],
+            "proxima": fila[5],
+            "ultima": fila[6],
+            "error": fila[7],
+        }
+
+
+_consultas = None
+_consultas_lock = threading.Lock()
+
+
+def consultas_compartidas():
+    # Una sola conexión por proceso: Streamlit recrea la app en cada rerun
+    global _consultas
+    with _consultas_lock:
+        if _consultas is None:
+            _consultas = ConsultasGuardadas()
+        return _consultas
+
+
+class Presupuesto(CubetaFichas):
+    # "por_hora" búsquedas completas por tienda. A diferencia de reservar(), no
+    # pide fichas prestadas: sin saldo devuelve cuánto falta (con variación, para
+    # no marcar un ritmo fijo) y quien llama decide qué hacer mientras tanto
+    def __init__(self, por_hora, rafaga=1, variacion=VARIACION):
+        super().__init__(por_hora / 3600, rafaga)
+        self.variacion = variacion
+
+    def intentar(self):
+        with self._lock:
+            self._reponer()
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return 0.0
+            return _con_variacion((1 - self._fichas) / self.tasa, self.variacion)
+
+
+class Vigilante:
+    def __init__(self, consultas=None, sincronizador=None, historial=None, archivo=None,
+                 trabajadores=TRABAJADORES, presupuestos=PRESUPUESTO_POR_HORA, variacion=VARIACION):
+        if sincronizador is None:
+            sincronizador = Sincronizador(precios_frescos=True)
+        if archivo is None and archivo_columnar.disponible():
+            archivo = archivo_columnar.ArchivoColumnar()
+        self.consultas = consultas or consultas_compartidas()
+        self.sincronizador = sincronizador
+        self.historial = historial or historial_compartido()
+        self.archivo = archivo
+        self.trabajadores = trabajadores
+        self.variacion = variacion
+        self.presupuestos = {tienda: Presupuesto(por_hora, variacion=variacion) for tienda, por_hora in presupuestos.items()}
+        self._cola = queue.Queue()
+        self._pendientes = {}
+        self._pendientes_lock = threading.Lock()
+        self._parar = threading.Event()
+        self._hilos = []
+        self._diferidos = set()
+        self._diferidos_lock = threading.Lock()
+
+    def planificar(self, ahora=None):
+        # Encola un trabajo por (consulta, tienda) y reprograma la consulta de inmediato
+        # para que la siguiente revisión no la vuelva a encolar
+        encolados = 0
+        for consulta in self.consultas.pendientes(ahora):
+            with self._pendientes_lock:
+                if consulta["id"] in self._pendientes:
+                    continue
+                self._pendientes[consulta["id"]] = [len(consulta["tiendas"]), None]
+            self.consultas.reprogramar(consulta["id"], time.time() + _con_variacion(consulta["intervalo"], self.variacion))
+            for tienda in consulta["tiendas"]:
+                self._cola.put((consulta, tienda))
+                encolados += 1
+        return encolados
+
+    def procesar(self, consulta, tienda):
+        with cronometro("vigilante", tienda=tienda):
+            resultados = self.sincronizador.buscar(consulta["consulta"], [tienda], limite=consulta["limite"])
+        contar("vigilante_resultados", len(resultados), tienda=tienda)
+        self.historial.registrar(resultados, consulta=consulta["consulta"])
+        if self.archivo is not None:
+            self.archivo.agregar(resultados, consulta=consulta["consulta"])
+        return len(resultados)
+
+    def _terminar(self, consulta, error=None):
+        with self._pendientes_lock:
+            estado = self._pendientes[consulta["id"]]
+            estado[0] -= 1
+            estado[1] = estado[1] or error
+            if estado[0]:
+                return
+            del self._pendientes[consulta["id"]]
+        self.consultas.marcar(consulta["id"], estado[1])
+
+    def _trabajar(self):
+        while not self._parar.is_set():
+            trabajo = self._cola.get()
+            if trabajo is None:
+                self._cola.task_done()
+                return
+            consulta, tienda = trabajo
+            presupuesto = self.presupuestos.get(tienda)
+            espera = presupuesto.intentar() if presupuesto is not None else 0.0
+            if espera > 0:
+                # La tienda agotó su presupuesto: el trabajo vuelve a la cola cuando
+                # haya saldo y el hilo sigue con los de otras tiendas
+                self._diferir(trabajo, espera)
+                continue
+            error = None
+            try:
+                if not self.procesar(consulta, tienda):
+                    error = f"{tienda}: sin resultados"
+            except Exception as e:
+                error = f"{tienda}: {e}"
+            finally:
+                self._terminar(consulta, error)
+                self._cola.task_done()
+
+    def _diferir(self, trabajo, espera):
+        # El trabajo original se da por terminado solo después de volver a encolarlo,
+        # así join() de la cola no regresa mientras quede uno diferido
+        def volver():
+            with self._diferidos_lock:
+                if temporizador not in self._diferidos:
+                    return  # detener() ya lo canceló y lo dio por terminado
+                self._diferidos.discard(temporizador)
+            self._cola.put(trabajo)
+            self._cola.task_done()
+
+        temporizador = threading.Timer(espera, volver)
+        temporizador.daemon = True
+        with self._diferidos_lock:
+            self._diferidos.add(temporizador)
+        contar("vigilante_diferidos", tienda=trabajo[1])
+        temporizador.start()
+
+    def iniciar(self):
+        self._parar.clear()
+        self._hilos = [threading.Thread(target=self._trabajar, daemon=True) for _ in range(self.trabajadores)]
+        for hilo in self._hilos:
+            hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        with self._diferidos_lock:
+            diferidos, self._diferidos = self._diferidos, set()
+        for temporizador in diferidos:
+            temporizador.cancel()
+            self._cola.task_done()
+        for _ in self._hilos:
+            self._cola.put(None)
+        for hilo in self._hilos:
+            hilo.join()
+
+    def correr_una_vez(self):
+        # Atiende lo que esté vencido y regresa (útil desde cron)
+        self.iniciar()
+        self.planificar()
+        self._cola.join()
+        self.detener()
+
+    def correr(self, metricas=None):
+        # metricas: ruta donde volcar las métricas en cada revisión (.json o texto Prometheus)
+        self.iniciar()
+        try:
+            while not self._parar.is_set():
+                self.planificar()
+                if metricas:
+                    metricas_compartidas().volcar(metricas)
+                self._parar.wait(REVISION_SEGUNDOS)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    ordenes = parser.add_subparsers(dest="orden", required=True)
+    agregar = ordenes.add_parser("agregar")
+    agregar.add_argument("consulta")
+    agregar.add_argument("--tiendas", nargs="+", default=TIENDAS, choices=TIENDAS)
+    agregar.add_argument("--limite", type=int, default=10)
+    agregar.add_argument("--cada", type=float, default=INTERVALO_SEGUNDOS / 60, help="minutos entre corridas")
+    ordenes.add_parser("listar")
+    quitar = ordenes.add_parser("quitar")
+    quitar.add_argument("id", type=int)
+    correr = ordenes.add_parser("correr")
+    correr.add_argument("--una-vez", action="store_true")
+    correr.add_argument("--trabajadores", type=int, default=TRABAJADORES)
+    correr.add_argument("--metricas", help="archivo .json o .prom donde volcar las métricas")
+    args = parser.parse_args()
+
+    consultas = consultas_compartidas()
+    if args.orden == "agregar":
+        id_consulta = consultas.guardar(args.consulta, args.tiendas, args.limite, args.cada * 60)
+        print(f"Consulta {id_consulta} guardada")
+    elif args.orden == "listar":
+        for consulta in consultas.listar():
+            print(f"{consulta['id']:>4}  {consulta['consulta']!r}  {', '.join(consulta['tiendas'])}  "
+                  f"límite {consulta['limite']}  cada {consulta['intervalo'] / 60:.0f} min"
+                  + (f"  último error: {consulta['error']}" if consulta["error"] else ""))
+    elif args.orden == "quitar":
+        print("Consulta eliminada" if consultas.quitar(args.id) else "No existe esa consulta")
+    else:
+        vigilante = Vigilante(consultas=consultas, trabajadores=args.trabajadores)
+        if args.una_vez:
+            vigilante.correr_una_vez()
+            if args.metricas:
+                metricas_compartidas().volcar(args.metricas)
+        else:
+            vigilante.correr(args.metricas)
+
+
+if __name__ == "__main__":
+    main()
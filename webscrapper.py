@@ -1,9 +1,9 @@
 import os
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime
 import streamlit as st
+from sesion_http import Bloqueado, obtener_sesion
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
@@ -27,7 +27,7 @@ def generate_pdf(data, query):
 
         if item.get("URL Imagen"):
             try:
-                response = requests.get(item["URL Imagen"], stream=True, timeout=5)
+                response = obtener_sesion().get(item["URL Imagen"], timeout=5)
                 if response.status_code == 200:
                     image_bytes = io.BytesIO(response.content)
                     img = RLImage(image_bytes, width=100, height=100)
@@ -52,7 +52,10 @@ def get_product_info_amazon(url):
         'Accept-Language': 'en-US,en;q=0.9'
     }
 
-    response = requests.get(url, headers=headers)
+    try:
+        response = obtener_sesion().get(url, headers=headers)
+    except Bloqueado:
+        return 'No title found', None, None
     soup = BeautifulSoup(response.text, features='lxml')
 
     try:
@@ -80,7 +83,10 @@ def get_search_results_amazon(query):
     }
 
     url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"
-    response = requests.get(url, headers=headers)
+    try:
+        response = obtener_sesion().get(url, headers=headers)
+    except Bloqueado:
+        return []
     soup = BeautifulSoup(response.text, features='lxml')
 
     product_links = []
@@ -90,7 +96,7 @@ def get_search_results_amazon(query):
 
 def obtener_titulo_desde_pagina(url, headers):
     try:
-        respuesta = requests.get(url, headers=headers)
+        respuesta = obtener_sesion().get(url, headers=headers)
         sopa = BeautifulSoup(respuesta.text, "html.parser")
         titulo_tag = sopa.find("h1", class_="ui-pdp-title")
         return titulo_tag.text.strip() if titulo_tag else "Sin título"
@@ -101,7 +107,10 @@ def buscar_en_mercado_libre(producto: str, limite=10):
     query = producto.replace(" ", "+")
     url = f"https://listado.mercadolibre.com.mx/{query}"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    respuesta = requests.get(url, headers=headers)
+    try:
+        respuesta = obtener_sesion().get(url, headers=headers)
+    except Bloqueado:
+        return []
     sopa = BeautifulSoup(respuesta.text, "html.parser")
 
     items = sopa.find_all("li", class_="ui-search-layout__item")